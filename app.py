@@ -1,21 +1,10 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-from supabase import create_client, Client
 from datetime import datetime
-import io
-import re
-import pdfplumber
+import hashlib
+import json
 import os
 import time
 
-# Imports pour le PDF Pro
-from reportlab.lib.pagesizes import A4
-from reportlab.pdfgen import canvas
-from reportlab.platypus import Table, TableStyle
-from reportlab.lib import colors
-from textwrap import wrap
-
 # --- CONFIGURATION PAGE ---
 st.set_page_config(page_title="JubaPneu ERP", layout="wide", page_icon="🛞")
 
@@ -46,183 +35,129 @@ def check_password():
 
 if not check_password(): st.stop()
 
+# Imports après l'authentification : l'écran de connexion n'en paie pas le coût.
+# plotly (statistiques) et reportlab (jubapneu.pdf) sont importés dans les pages qui s'en servent.
+import pandas as pd
+
+from jubapneu.connexion import creer_client
+from jubapneu.factures import creer_facture, lignes_factures, numero_facture
+from jubapneu.instrumentation import ClientInstrumente, Mesure, activer, courante, section
+from jubapneu.pagination import PageurKeyset, filtres_periode
+from jubapneu.recherche import IndexPneus
+from jubapneu.stats import RollupCA, top_ventes
+from jubapneu.store import DataStore
+
 # =========================================================
 # ✅ APP
 # =========================================================
 @st.cache_resource
 def init_connection():
     try:
-        try:
-            import secrets_config; local_url = secrets_config.SUPABASE_URL; local_key = secrets_config.SUPABASE_KEY
-        except ImportError: local_url = None; local_key = None
-        if "SUPABASE_URL" in st.secrets: url = st.secrets["SUPABASE_URL"]; key = st.secrets["SUPABASE_KEY"]
-        elif local_url: url = local_url; key = local_key
-        else: st.error("Clés introuvables."); return None
-        return create_client(url, key)
+        # st.secrets d'abord, sinon variables d'environnement / secrets_config.py (cf. jubapneu.connexion)
+        if "SUPABASE_URL" in st.secrets: return ClientInstrumente(creer_client(st.secrets["SUPABASE_URL"], st.secrets["SUPABASE_KEY"]))
+        return ClientInstrumente(creer_client())
     except Exception as e: st.error(f"Erreur : {e}"); return None
 
 supabase = init_connection()
 
+# --- PERF (opt-in : ?perf=1 dans l'URL ; JUBAPNEU_PERF_LOG=fichier.jsonl pour archiver) ---
+if st.query_params.get("perf") == "1": st.session_state.perf = True
+perf_actif = st.session_state.get("perf", False)
+
+def perf_archiver(m):
+    hist = st.session_state.setdefault("perf_hist", []); hist.append(m.resume()); del hist[:-200]
+    if os.environ.get("JUBAPNEU_PERF_LOG"):
+        with open(os.environ["JUBAPNEU_PERF_LOG"], "a", encoding="utf-8") as f: f.write(m.jsonl() + "\n")
+
+def perf_debut():
+    if not perf_actif: activer(None); return
+    prec = st.session_state.get("perf_courante")
+    # Rerun précédent coupé par st.rerun()/st.stop() : archivé tel quel
+    if prec and prec.duree is None: perf_archiver(prec.terminer(interrompu=True))
+    st.session_state.perf_courante = m = Mesure(); activer(m)
+
+perf_debut()
+
 # --- DATA ---
+# JUBAPNEU_REPLICA=fichier.db : articles / clients / services / factures récentes lus dans une réplique SQLite locale,
+# ventes mises en file et envoyées en arrière-plan (cf. jubapneu.replica)
+REPLICA = os.environ.get("JUBAPNEU_REPLICA")
+
+@st.cache_resource
+def get_store():
+    if REPLICA:
+        from jubapneu.replica import Replica
+        return Replica(supabase, REPLICA, DataStore(supabase)).demarrer()
+    return DataStore(supabase)
+
+@st.cache_resource
+def get_index():
+    idx = IndexPneus(); get_store().subscribe('articles', idx.charger)
+    return idx
+
 def load_all_data():
-    if not supabase: return pd.DataFrame(), pd.DataFrame(), pd.DataFrame(), pd.DataFrame(), pd.DataFrame()
-    stock = pd.DataFrame(supabase.table('articles').select("*").execute().data)
-    mouv = pd.DataFrame(supabase.table('mouvements_stock').select("*").execute().data)
-    clients = pd.DataFrame(supabase.table('clients').select("*").order('nom').execute().data)
-    factures = pd.DataFrame(supabase.table('factures_entete').select('*, clients(*)').order('created_at', desc=True).execute().data)
-    services = pd.DataFrame(supabase.table('services').select("*").order('description').execute().data)
-    return stock, mouv, clients, factures, services
+    # mouvements_stock et factures_entete ne sont plus chargés en entier : pages dédiées, paginées côté serveur
+    if not supabase: return pd.DataFrame(), pd.DataFrame(), pd.DataFrame()
+    return get_store().get_many('articles', 'clients', 'services')
+
+def get_pageur(table, select, filtres, taille=100):
+    # Un pageur par session et par jeu de filtres ; changer de filtre repart en page 1
+    cle = (table, select, tuple(filtres), taille)
+    if st.session_state.get(f"pg_{table}", (None,))[0] != cle: st.session_state[f"pg_{table}"] = (cle, PageurKeyset(supabase, table, select, filtres, taille)); st.session_state[f"pgn_{table}"] = 0
+    return st.session_state[f"pg_{table}"][1]
+
+def afficher_page(table, pg):
+    # Page courante bornée aux pages atteignables (la liste a pu raccourcir depuis le dernier affichage)
+    n = st.session_state[f"pgn_{table}"] = pg.borner(st.session_state[f"pgn_{table}"]); rows = pg.page(n)
+    c1, c2, c3 = st.columns([1,2,1])
+    if c1.button("◀", disabled=n==0, key=f"prev_{table}"): st.session_state[f"pgn_{table}"] -= 1; st.rerun()
+    c2.caption(f"Page {n+1}")
+    if c3.button("▶", disabled=not pg.a_suivante(n), key=f"next_{table}"): st.session_state[f"pgn_{table}"] += 1; st.rerun()
+    df = pd.DataFrame(rows)
+    if not df.empty: df['created_at'] = pd.to_datetime(df['created_at'], errors='coerce')
+    return df
+
+@st.cache_resource
+def get_valorisation():
+    from jubapneu.valorisation import ValorisationStock
+    v = ValorisationStock(); get_store().subscribe('mouvements_stock', v.charger)
+    return v
+
+@st.cache_resource
+def get_rollup_ca():
+    r = RollupCA(supabase)
+    if REPLICA: get_store().abonner_envois(r.invalidate)
+    return r
+
+@st.cache_data(ttl=60)
+def get_top_ventes(debut, fin, saisons, marques, limite):
+    return top_ventes(supabase, debut, fin, saisons, marques, limite)
+
+def editeur(df, colonnes, key, **kw):
+    # Tant que des modifications sont en cours, l'éditeur reste sur la copie affichée au départ : les positions
+    # de edited_rows / deleted_rows désignent les mêmes lignes même si les données ont été relues entre-temps
+    etat = st.session_state.get(key) or {}
+    if f"{key}_base" not in st.session_state or not any(etat.get(k) for k in ('edited_rows', 'added_rows', 'deleted_rows')):
+        st.session_state[f"{key}_base"] = df.reset_index(drop=True)
+    return st.data_editor(st.session_state[f"{key}_base"][colonnes], key=key, **kw)
+
+def sauver_editeur(table, key):
+    # N'envoie que le différentiel de l'éditeur (calculé sur la copie affichée) : lignes modifiées, ajoutées, supprimées
+    from jubapneu.editeur import diff_editeur, enregistrer
+    from jubapneu.lots import EcritureIncomplete
+    maj, ajouts, suppr = diff_editeur(st.session_state[f"{key}_base"], st.session_state.get(key, {}))
+    if not (maj or ajouts or suppr): st.info("Aucune modification."); return
+    try: rep = enregistrer(supabase, table, maj, ajouts, suppr)
+    except EcritureIncomplete as e: st.error(f"Enregistrement incomplet — {e}"); st.stop()
+    finally: get_store().invalidate(table, full=bool(suppr))
+    st.session_state.pop(key, None); st.session_state.pop(f"{key}_base", None)
+    st.success(f"OK : {rep['modifiees']} modifiée(s), {rep['ajoutees']} ajoutée(s), {rep['supprimees']} supprimée(s)."); time.sleep(1); st.rerun()
 
 def get_facture_lines(facture_id):
     return supabase.table('factures_lignes').select('*, articles(*)').eq('facture_id', facture_id).execute().data
 
-# --- GÉNÉRATEUR PDF (PRO) ---
-def generer_pdf(facture_id, client_dict, lignes, total_ttc, numero_facture, date_obj=None):
-    import os
-    buffer = io.BytesIO()
-    c = canvas.Canvas(buffer, pagesize=A4)
-    width, height = A4
-    
-    # Gestion de la date
-    if not date_obj: date_str = datetime.now().strftime('%d/%m/%Y')
-    elif isinstance(date_obj, str): date_str = date_obj 
-    else: date_str = date_obj.strftime('%d/%m/%Y')
-
-    # --- 1. EN-TÊTE GAUCHE (Logo & Entreprise) ---
-    dossier_actuel = os.path.dirname(os.path.abspath(__file__))
-    chemin_logo = os.path.join(dossier_actuel, "logo.png")
-
-    if os.path.exists(chemin_logo):
-        try:
-            # L'image a maintenant une hauteur définie pour être visible
-            c.drawImage(chemin_logo, 50, height - 110, width=140, height=60, preserveAspectRatio=True, mask='auto')
-        except Exception as e:
-            c.setFont("Helvetica-Bold", 20)
-            c.drawString(50, height - 50, "JUBAPNEU")
-    else:
-        c.setFont("Helvetica-Bold", 20)
-        c.drawString(50, height - 50, "JUBAPNEU")
-
-    c.setFont("Helvetica", 10)
-    y_info = height - 120 
-    c.drawString(50, y_info, "10 Place Jeanne d'Arc - 54310 Homécourt")
-    c.drawString(50, y_info - 15, "Tel: 09 54 45 98 22")
-    c.drawString(50, y_info - 30, "Email: contact@jubapneu.eu | Web: jubapneu.eu")
-    
-    # --- 2. EN-TÊTE DROITE (Numéro Facture) ---
-    c.setFont("Helvetica-Bold", 16)
-    c.drawRightString(width - 50, height - 50, "FACTURE")
-    c.setFont("Helvetica", 12)
-    c.drawRightString(width - 50, height - 70, f"N° {numero_facture}")
-    c.setFont("Helvetica", 10)
-    c.drawRightString(width - 50, height - 90, f"Le {date_str}")
-    
-    # --- 3. BLOC CLIENT ---
-    c.roundRect(width - 250, height - 200, 200, 75, 5)
-    c.setFont("Helvetica-Bold", 11)
-    c.drawString(width - 240, height - 145, f"Client : {client_dict.get('nom', 'Inconnu')}")
-    c.setFont("Helvetica", 10)
-    if client_dict.get('adresse'): 
-        c.drawString(width - 240, height - 160, f"{client_dict['adresse']}")
-        c.drawString(width - 240, height - 175, f"{client_dict.get('code_postal', '')} {client_dict.get('ville', '')}")
-    
-    # --- 4. TABLEAU DES LIGNES ---
-    data = [["Désignation", "Qté", "TVA", "Montant HT", "Montant TTC"]]
-    
-    total_ht = 0
-    total_tva = 0
-    
-    for l in lignes:
-        desc = l.get('desc') or (f"Pneu {l['articles']['marque']} {l['articles']['dimension_complete']}" if l.get('articles') else "Service")
-        qte = l.get('qte') or l.get('quantite')
-        prix_ttc_unit = l.get('prix') or l.get('prix_vente_unitaire')
-        
-        prix_ttc_total = qte * prix_ttc_unit
-        prix_ht_total = prix_ttc_total / 1.20
-        tva_total = prix_ttc_total - prix_ht_total
-        
-        total_ht += prix_ht_total
-        total_tva += tva_total
-        
-        desc_wrapped = "\n".join(wrap(desc, 45)) 
-        
-        data.append([
-            desc_wrapped, 
-            str(qte), 
-            "20%", 
-            f"{prix_ht_total:.2f} €", 
-            f"{prix_ttc_total:.2f} €"
-        ])
-        
-    table = Table(data, colWidths=[230, 40, 40, 80, 80])
-    table.setStyle(TableStyle([
-        ('BACKGROUND', (0,0), (-1,0), colors.HexColor("#f2f2f2")),
-        ('TEXTCOLOR', (0,0), (-1,0), colors.black),
-        ('ALIGN', (0,0), (-1,-1), 'CENTER'),
-        ('ALIGN', (0,1), (0,-1), 'LEFT'),   
-        ('ALIGN', (3,1), (-1,-1), 'RIGHT'), 
-        ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
-        ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold'),
-        ('BOTTOMPADDING', (0,0), (-1,0), 8),
-        ('GRID', (0,0), (-1,-1), 0.5, colors.grey)
-    ]))
-    
-    table.wrapOn(c, width, height)
-    w, h = table.wrap(0, 0)
-    y_pos = height - 240 - h
-    table.drawOn(c, 50, y_pos)
-    
-    # --- 5. TOTAUX ---
-    y_tot = y_pos - 30
-    c.setFont("Helvetica-Bold", 10)
-    c.drawRightString(width - 140, y_tot, "Total HT :")
-    c.drawRightString(width - 50, y_tot, f"{total_ht:.2f} €")
-    
-    y_tot -= 15
-    c.setFont("Helvetica", 10)
-    c.drawRightString(width - 140, y_tot, "TVA (20%) :")
-    c.drawRightString(width - 50, y_tot, f"{total_tva:.2f} €")
-    
-    y_tot -= 20
-    c.setFont("Helvetica-Bold", 12)
-    c.drawRightString(width - 140, y_tot, "Total TTC :")
-    c.drawRightString(width - 50, y_tot, f"{total_ttc:.2f} €")
-    
-    # --- 6. CONDITIONS DE PAIEMENT ---
-    c.setFont("Helvetica", 9)
-    c.drawString(50, y_tot, "Conditions de paiement :")
-    c.drawString(50, y_tot - 15, f"• 100,00% soit {total_ttc:.2f} € à payer comptant.")
-    
-    # --- 7. PIED DE PAGE LÉGAL ---
-    c.setFont("Helvetica", 8)
-    c.setFillColor(colors.dimgrey)
-    c.drawCentredString(width / 2, 40, "SARL - Société à Responsabilité Limitée JubaPneu au capital social de 10 000€")
-    c.drawCentredString(width / 2, 30, "Siège social: 10 Place Jeanne d'Arc-54310 Homécourt")
-    c.drawCentredString(width / 2, 20, "Siret: 92063340100012 | Numéro TVA Intracommunautaire: FR09920633401")
-    
-    c.showPage()
-    c.save()
-    buffer.seek(0)
-    return buffer
-
-# --- ANALYSE PDF ---
-def analyser_ligne_deldo(description):
-    infos = {"valid": False, "dimension_complete": description, "largeur": None, "hauteur": None, "diametre": None, "charge": "", "vitesse": "", "saison": "Été", "marque": "Inconnue"}
-    regex = r"(\d{3})\s+(\d{2})\s+[A-Z]+\s+(\d{2})\s+(\d{2,3})\s+([A-Z])\s"; match = re.search(regex, description)
-    if match:
-        infos["valid"]=True; infos["largeur"]=int(match.group(1)); infos["hauteur"]=int(match.group(2)); infos["diametre"]=int(match.group(3))
-        infos["charge"]=match.group(4); infos["vitesse"]=match.group(5)
-        infos["dimension_complete"] = f"{infos['largeur']}/{infos['hauteur']} R{infos['diametre']} {infos['charge']}{infos['vitesse']}"
-    else: return infos
-    desc_up = description.upper()
-    if "AS" in desc_up or "4S" in desc_up or "ALL" in desc_up: infos["saison"]="4 Saisons"
-    elif "WINTER" in desc_up or "HIVER" in desc_up: infos["saison"]="Hiver"
-    mots = description.split(); 
-    if mots: infos["marque"] = mots[0]
-    return infos
-
 # --- INIT ---
-df_stock, df_hist, df_clients, df_factures, df_services = load_all_data()
+with section("Chargement données"): df_stock, df_clients, df_services = load_all_data()
 if 'panier' not in st.session_state: st.session_state.panier = []
 if 'facture_reussie' not in st.session_state: st.session_state.facture_reussie = None
 
@@ -236,6 +171,7 @@ page=""
 if tiroir == "📦 STOCK": page = st.sidebar.radio("Nav", ["Stock Actuel", "📥 Importer Facture Fournisseur", "Historique Mouvements"])
 elif tiroir == "💰 FACTURATION": page = st.sidebar.radio("Nav", ["Nouvelle Facture", "Mes Factures", "Clients", "Gestion Services"])
 elif tiroir == "📊 STATISTIQUES": page = st.sidebar.radio("Nav", ["Chiffre d'Affaires", "Top Ventes", "Valeur Stock"])
+if courante(): courante().page = page
 
 # =========================================================
 # STOCK
@@ -243,10 +179,11 @@ elif tiroir == "📊 STATISTIQUES": page = st.sidebar.radio("Nav", ["Chiffre d'A
 if page == "Stock Actuel":
     st.title("📦 Stock")
     if not df_stock.empty:
-        df_view = df_stock[df_stock['stock_actuel'] > 0].copy()
-        c1, c2 = st.columns([2,1]); search = c1.text_input("🔍", placeholder="Recherche..."); saisons = c2.multiselect("Saison", df_view['saison'].unique())
-        if search: df_view = df_view[df_view.astype(str).apply(lambda x: x.str.contains(search, case=False)).any(axis=1)]
-        if saisons: df_view = df_view[df_view['saison'].isin(saisons)]
+        c1, c2, c3 = st.columns([2,1,1]); search = c1.text_input("🔍", placeholder="205 55 16, 2055516, 205/55R16 91V, Michelin...")
+        saisons = c2.multiselect("Saison", df_stock['saison'].dropna().unique()); marques = c3.multiselect("Marque", df_stock['marque'].dropna().unique())
+        ids = get_index().chercher(search, saisons=saisons, marques=marques)
+        if ids and get_index().approchant(search): st.caption("⚠️ Aucune dimension exacte : résultats approchants.")
+        df_view = df_stock.set_index('id', drop=False).reindex(ids).dropna(subset=['id'])
         st.dataframe(df_view[['dimension_complete', 'stock_actuel', 'marque', 'saison', 'charge', 'vitesse', 'pmp_achat']], column_config={"stock_actuel": st.column_config.NumberColumn("Stock", format="%d"), "pmp_achat": st.column_config.NumberColumn("PMP", format="%.2f €")}, use_container_width=True, height=600)
     else: st.info("Stock vide.")
 
@@ -254,42 +191,32 @@ elif page == "📥 Importer Facture Fournisseur":
     st.title("📥 Import Deldo")
     f = st.file_uploader("PDF", type="pdf")
     if f:
-        st.write("Analyse..."); found = []
-        with pdfplumber.open(f) as pdf:
-            for p in pdf.pages:
-                txt = p.extract_text() or ""
-                for l in txt.split('\n'):
-                    m = re.search(r"^(\d+)\s+(.+)\s+(\d+\.\d{2})\s+(\d+\.\d{2})$", l.strip())
-                    if m:
-                        inf = analyser_ligne_deldo(m.group(2))
-                        if inf["valid"]: found.append({"Desc": inf['dimension_complete'], "Marque": inf['marque'], "Qté": int(m.group(1)), "Prix": float(m.group(3)), "_inf": inf})
+        from jubapneu.importer import importer_facture
+        from jubapneu.lots import EcritureIncomplete
+        from jubapneu.parsing import parser_pdf
+        found = []; bar = st.progress(0.0, "Analyse..."); apercu = st.empty()
+        with section("Analyse PDF"):
+            for lus, total, found in parser_pdf(f.getvalue()):
+                bar.progress(lus / max(total, 1), f"Analyse... {lus}/{total} pages")
+                if found: apercu.dataframe(pd.DataFrame(found)[['Desc', 'Marque', 'Qté', 'Prix']], use_container_width=True)
+        bar.empty()
         if found:
-            st.dataframe(pd.DataFrame(found)[['Desc', 'Marque', 'Qté', 'Prix']], use_container_width=True)
             if st.button("🚀 VALIDER L'IMPORT"):
                 bar = st.progress(0)
-                for i, it in enumerate(found):
-                    inf = it['_inf']; q = it['Qté']; p = it['Prix']
-                    now_iso = datetime.now().isoformat()
-                    
-                    res = supabase.table('articles').select("*").eq('dimension_complete', inf['dimension_complete']).eq('marque', inf['marque']).execute()
-                    if res.data:
-                        ex = res.data[0]; old_s = ex['stock_actuel']; old_p = float(ex['pmp_achat'] or 0)
-                        ns = old_s + q; np = ((old_s * old_p) + (q * p)) / ns if ns > 0 else p
-                        supabase.table('articles').update({'stock_actuel': ns, 'pmp_achat': np}).eq('id', ex['id']).execute(); aid = ex['id']
-                    else:
-                        new = {'dimension_complete': inf['dimension_complete'], 'largeur': inf['largeur'], 'hauteur': inf['hauteur'], 'diametre': inf['diametre'], 'charge': inf['charge'], 'vitesse': inf['vitesse'], 'marque': inf['marque'], 'saison': inf['saison'], 'stock_actuel': q, 'pmp_achat': p}
-                        aid = supabase.table('articles').insert(new).execute().data[0]['id']
-                    
-                    supabase.table('mouvements_stock').insert({'article_id': aid, 'type_mouvement': 'ACHAT', 'quantite': q, 'prix_achat_unitaire': p, 'lien_facture_fournisseur': f.name, 'created_at': now_iso}).execute()
-                    bar.progress((i+1)/len(found))
-                st.success("Importé !"); st.cache_resource.clear(); time.sleep(2); st.rerun()
+                try: rep = importer_facture(supabase, found, f.name, bar.progress, hashlib.sha256(f.getvalue()).hexdigest())
+                except EcritureIncomplete as e: st.error(f"Import incomplet — {e}"); st.stop()
+                finally: get_store().invalidate('articles', 'mouvements_stock')
+                if rep['deja_importes']: st.info(f"{rep['deja_importes']} référence(s) déjà importée(s) avec ce fichier : ignorées.")
+                st.success(f"Importé ! {rep['articles']} références ({rep['crees']} nouvelles)."); time.sleep(2); st.rerun()
         else: st.warning("Rien trouvé.")
 
 elif page == "Historique Mouvements":
     st.title("📜 Historique")
-    if not df_hist.empty:
-        df_hist['created_at'] = pd.to_datetime(df_hist['created_at'], errors='coerce')
-        st.dataframe(df_hist.dropna(subset=['created_at']).sort_values('created_at', ascending=False), use_container_width=True)
+    c1, c2 = st.columns(2); per = c1.date_input("Période", (), format="DD/MM/YYYY"); ty = c2.multiselect("Type", ["ACHAT", "VENTE"])
+    pg = get_pageur('mouvements_stock', '*', filtres_periode(per[0] if per else None, per[-1] if per else None) + ([('in_', 'type_mouvement', tuple(ty))] if ty else []))
+    df_hist = afficher_page('mouvements_stock', pg)
+    if not df_hist.empty: st.dataframe(df_hist, use_container_width=True)
+    else: st.info("Aucun mouvement.")
 
 # =========================================================
 # FACTURATION
@@ -314,9 +241,12 @@ elif page == "Nouvelle Facture":
         with ca:
             st.subheader("🛞 Pneu")
             if not df_stock.empty:
-                lp=["--"]+df_stock[df_stock['stock_actuel']>0]['dimension_complete'].unique().tolist(); cp=st.selectbox("Réf", lp)
-                if cp!="--":
-                    r=df_stock[df_stock['dimension_complete']==cp].iloc[0]; st.caption(f"Stock: {r['stock_actuel']}")
+                dfi=df_stock.set_index('id'); qd=st.text_input("🔍 Dimension", placeholder="205 55 16", key="qdim")
+                lp=[None]+[i for i in get_index().chercher(qd, limite=200) if i in dfi.index]
+                if len(lp) > 1 and get_index().approchant(qd): st.caption("⚠️ Aucune dimension exacte : résultats approchants.")
+                cp=st.selectbox("Réf", lp, format_func=lambda i: "--" if i is None else f"{dfi.at[i,'dimension_complete']} — {dfi.at[i,'marque']} ({dfi.at[i,'stock_actuel']})")
+                if cp is not None:
+                    r=df_stock[df_stock['id']==cp].iloc[0]; st.caption(f"Stock: {r['stock_actuel']}")
                     q=st.number_input("Qté", 1, int(r['stock_actuel']), 2, key="qp"); px=st.number_input("Prix", value=float(f"{(r['pmp_achat'] or 0)*1.4:.2f}"), key="pp")
                     if st.button("➕ Ajout Pneu"): st.session_state.panier.append({"type":"PNEU", "id":int(r['id']), "desc":f"Pneu {r['marque']} {r['dimension_complete']}", "qte":q, "prix":px, "cout":float(r['pmp_achat'] or 0)}); st.rerun()
         with cb:
@@ -334,69 +264,136 @@ elif page == "Nouvelle Facture":
             if cv.button("✅ VALIDER", type="primary"):
                 if not cli['nom']: st.error("Nom client !")
                 else:
-                    cid=cli.get('id')
-                    if not cid: cid=supabase.table('clients').insert({k:v for k,v in cli.items() if k!='id'}).execute().data[0]['id']
-                    num=f"FV-{datetime.now().strftime('%y%m-%H%M')}"; fid=supabase.table('factures_entete').insert({"client_id":cid, "total_ttc":tot, "numero_facture":num, "statut":"Payée"}).execute().data[0]['id']
-                    for it in st.session_state.panier:
-                        supabase.table('factures_lignes').insert({"facture_id":fid, "article_id":it['id'], "quantite":it['qte'], "prix_vente_unitaire":it['prix'], "cout_achat_historique":it['cout']}).execute()
-                        if it['type']=="PNEU":
-                            cur=supabase.table('articles').select('stock_actuel').eq('id',it['id']).execute().data[0]['stock_actuel']
-                            supabase.table('articles').update({'stock_actuel':cur-it['qte']}).eq('id',it['id']).execute()
-                            supabase.table('mouvements_stock').insert({"article_id":it['id'], "type_mouvement":"VENTE", "quantite":-it['qte'], "lien_facture_fournisseur":f"Vente {num}", "created_at":datetime.now().isoformat()}).execute()
-                    pdf=generer_pdf(fid, cli, st.session_state.panier, tot, num); st.session_state.facture_reussie={"num":num, "pdf":pdf, "client":cli['nom']}; st.rerun()
+                    num=numero_facture(); fid=None
+                    if REPLICA: get_store().vendre(cli, st.session_state.panier, tot, num)
+                    else:
+                        try: fid=creer_facture(supabase, cli, st.session_state.panier, tot, num)['facture_id']
+                        except Exception as e: st.error(f"Facture refusée : {getattr(e, 'message', e)}"); st.stop()
+                        get_store().invalidate('articles', 'mouvements_stock', 'factures_entete', *(('clients',) if not cli.get('id') else ())); get_rollup_ca().invalidate()
+                    from jubapneu.pdf import generer_pdf
+                    with section("Rendu PDF"): pdf=generer_pdf(fid, cli, st.session_state.panier, tot, num)
+                    st.session_state.facture_reussie={"num":num, "pdf":pdf, "client":cli['nom']}; st.rerun()
             if st.button("🗑️ Vider"): st.session_state.panier=[]; st.rerun()
 
 elif page == "Mes Factures":
+    from jubapneu.pdf import generer_lot, generer_pdf
     st.title("📂 Factures")
+    c1, c2 = st.columns(2); per = c1.date_input("Période", (), format="DD/MM/YYYY"); fc = c2.selectbox("Client", [None]+(df_clients['id'].tolist() if not df_clients.empty else []), format_func=lambda i: "Tous" if i is None else df_clients.loc[df_clients['id']==i, 'nom'].iloc[0])
+    # Réplique : factures récentes et ventes en file lues en local ; une période plus ancienne interroge le serveur
+    local = REPLICA and get_store().couvre(per[0] if per else None)
+    if local:
+        from jubapneu.replica import JOURS_FACTURES
+        df_factures = get_store().factures(per[0] if per else None, per[-1] if per else None, fc)
+        st.caption(f"{len(df_factures)} facture(s) · {JOURS_FACTURES} derniers jours au plus, lus en local")
+    else:
+        pg = get_pageur('factures_entete', '*, clients(*)', filtres_periode(per[0] if per else None, per[-1] if per else None) + ([('eq', 'client_id', int(fc))] if fc is not None else []))
+        df_factures = afficher_page('factures_entete', pg)
     if not df_factures.empty:
-        df_factures['created_at'] = pd.to_datetime(df_factures['created_at'], errors='coerce')
-        dfd=df_factures.copy(); dfd['Date']=dfd['created_at'].dt.strftime('%d/%m/%Y'); dfd['Client']=dfd['clients'].apply(lambda x:x['nom'] if x else '?')
-        st.dataframe(dfd[['numero_facture','Date','Client','total_ttc']], use_container_width=True)
-        sel=st.selectbox("Imprimer", df_factures['numero_facture'].tolist())
+        dfd=df_factures.copy(); dfd['Date']=dfd['created_at'].dt.strftime('%d/%m/%Y'); dfd['Client']=dfd['clients'].apply(lambda x:x['nom'] if isinstance(x, dict) else '?')
+        st.dataframe(dfd[['numero_facture','Date','Client','total_ttc','statut']], use_container_width=True)
+        sel=st.selectbox("Imprimer", range(len(df_factures)), format_func=lambda i: df_factures['numero_facture'].iloc[i])
         if st.button("PDF"):
-            r=df_factures[df_factures['numero_facture']==sel].iloc[0]
-            ls=[{"desc":f"Pneu {l['articles']['marque']} {l['articles']['dimension_complete']}" if l['articles'] else "Svc", "qte":l['quantite'], "prix":l['prix_vente_unitaire']} for l in get_facture_lines(r['id'])]
-            st.download_button("Télécharger", generer_pdf(r['id'], r['clients'], ls, r['total_ttc'], r['numero_facture'], r['created_at']), f"Facture_{sel}.pdf", "application/pdf")
+            r=df_factures.iloc[sel]
+            ls=get_store().lignes([r.to_dict()]).popitem()[1] if local else get_facture_lines(r['id'])
+            with section("Rendu PDF"): pdf=generer_pdf(r['id'], r['clients'], ls, r['total_ttc'], r['numero_facture'], r['created_at'])
+            st.download_button("Télécharger", pdf, f"Facture_{r['numero_facture']}.pdf", "application/pdf")
+    else: st.info("Aucune facture.")
+    with st.expander("📦 Export en lot (comptable)"):
+        c1,c2,c3=st.columns(3); d1=c1.date_input("Du", datetime.now().replace(day=1)); d2=c2.date_input("Au", datetime.now()); fmt=c3.radio("Format", ["ZIP", "PDF unique"], horizontal=True)
+        if st.button("Générer l'export"):
+            lot_local = REPLICA and get_store().couvre(d1)
+            sel_lot=get_store().factures(d1, d2).iloc[::-1].to_dict('records') if lot_local else list(PageurKeyset(supabase, 'factures_entete', '*, clients(*)', filtres_periode(d1, d2), 500).tout())[::-1]
+            if not sel_lot: st.warning("Aucune facture sur la période.")
+            else:
+                bar=st.progress(0.0); lignes=get_store().lignes(sel_lot) if lot_local else lignes_factures(supabase, [r['id'] for r in sel_lot])
+                cles=[r['cle'] if pd.isna(r['id']) else int(r['id']) for r in sel_lot]
+                lot=[{"id":k, "client":r['clients'], "lignes":lignes[k], "total_ttc":float(r['total_ttc']), "numero_facture":r['numero_facture'], "date":pd.to_datetime(r['created_at'])} for k, r in zip(cles, sel_lot)]
+                zp=fmt=="ZIP"
+                with section("Rendu PDF (lot)"): out=generer_lot(lot, fusion=not zp, progress=bar.progress)
+                st.download_button(f"Télécharger l'export ({len(lot)} factures)", out, f"Factures_{d1:%Y%m%d}_{d2:%Y%m%d}.{'zip' if zp else 'pdf'}", "application/zip" if zp else "application/pdf")
 
 elif page == "Clients":
     st.title("👥 Clients")
     if not df_clients.empty:
-        ed=st.data_editor(df_clients[['id','nom','telephone','email','adresse','ville','siret']], key="edc", column_config={"id":st.column_config.NumberColumn(disabled=True)}, use_container_width=True)
-        if st.button("💾 Save"):
-            for i,r in ed.iterrows(): supabase.table('clients').update({"nom":r['nom'],"telephone":r['telephone'],"email":r['email'],"adresse":r['adresse'],"ville":r['ville'],"siret":r['siret']}).eq('id',r['id']).execute()
-            st.success("OK"); time.sleep(1); st.rerun()
+        editeur(df_clients, ['id','nom','telephone','email','adresse','ville','siret'], "edc", num_rows="dynamic", column_config={"id":st.column_config.NumberColumn(disabled=True)}, use_container_width=True)
+        if st.button("💾 Save"): sauver_editeur('clients', "edc")
 
 elif page == "Gestion Services":
     st.title("🔧 Services")
     with st.expander("➕"):
         with st.form("ads"):
             c1,c2=st.columns([3,1]); d=c1.text_input("Nom"); p=c2.number_input("Prix",0.0,100.0,15.0)
-            if st.form_submit_button("Ok"): supabase.table('services').insert({"description":d,"prix_unitaire":p,"categorie":"Montage"}).execute(); st.rerun()
+            if st.form_submit_button("Ok"): supabase.table('services').insert({"description":d,"prix_unitaire":p,"categorie":"Montage"}).execute(); get_store().invalidate('services'); st.rerun()
     if not df_services.empty:
-        eds=st.data_editor(df_services[['id','description','prix_unitaire','categorie']], key="eds", column_config={"id":st.column_config.NumberColumn(disabled=True)}, use_container_width=True)
-        if st.button("💾 Save Svc"):
-            for i,r in eds.iterrows(): supabase.table('services').update({"description":r['description'],"prix_unitaire":r['prix_unitaire'],"categorie":r['categorie']}).eq('id',r['id']).execute()
-            st.success("OK"); time.sleep(1); st.rerun()
+        editeur(df_services, ['id','description','prix_unitaire','categorie'], "eds", num_rows="dynamic", column_config={"id":st.column_config.NumberColumn(disabled=True)}, use_container_width=True)
+        if st.button("💾 Save Svc"): sauver_editeur('services', "eds")
 
 # =========================================================
 # STATS
 # =========================================================
 elif page == "Chiffre d'Affaires":
+    import plotly.express as px
     st.title("📈 CA")
-    if not df_factures.empty:
-        df_factures['created_at'] = pd.to_datetime(df_factures['created_at'], errors='coerce')
-        mode=st.radio("Vue",["Jour","Semaine","Mois"], horizontal=True); r='D' if mode=="Jour" else 'W' if mode=="Semaine" else 'M'
-        ch=df_factures.resample(r, on='created_at')['total_ttc'].sum().reset_index()
-        st.plotly_chart(px.bar(ch, x='created_at', y='total_ttc', title=f"CA ({mode})"), use_container_width=True)
-        st.metric("Total", f"{df_factures['total_ttc'].sum():.2f} €")
+    rollup=get_rollup_ca(); rollup.rafraichir()
+    c1,c2=st.columns([1,2]); mode=c1.radio("Vue",["Jour","Semaine","Mois"], horizontal=True); r='D' if mode=="Jour" else 'W' if mode=="Semaine" else 'M'
+    per=c2.date_input("Période", (), format="DD/MM/YYYY")
+    ch=rollup.serie(r, per[0] if per else None, per[-1] if per else None)
+    if not ch.empty:
+        with section("Graphiques"): fig=px.bar(ch, x='jour', y=['ca_ht', 'marge'], barmode='group', title=f"CA HT / Marge ({mode})")
+        st.plotly_chart(fig, use_container_width=True)
+        m1,m2,m3=st.columns(3); m1.metric("Total", f"{ch['ca_ttc'].sum():.2f} €"); m2.metric("Marge", f"{ch['marge'].sum():.2f} €"); m3.metric("Factures", f"{int(ch['nb_factures'].sum())}")
+    else: st.info("Aucune vente sur la période.")
 
 elif page == "Top Ventes":
+    import plotly.express as px
     st.title("🏆 Top")
-    res=supabase.table('factures_lignes').select('*, articles(*)').execute(); dfl=pd.DataFrame(res.data)
+    c1,c2,c3,c4=st.columns(4); per=c1.date_input("Période", (), format="DD/MM/YYYY"); sa=c2.multiselect("Saison", df_stock['saison'].dropna().unique() if not df_stock.empty else [])
+    mq=c3.multiselect("Marque", df_stock['marque'].dropna().unique() if not df_stock.empty else []); n=c4.number_input("Top", 5, 100, 10)
+    dfl=get_top_ventes(per[0] if per else None, per[-1] if per else None, tuple(sa), tuple(mq), n)
     if not dfl.empty:
-        dfl['Dim']=dfl.apply(lambda x:x['articles']['dimension_complete'] if x['articles'] else None, axis=1)
-        st.plotly_chart(px.bar(dfl.dropna(subset=['Dim']).groupby('Dim')['quantite'].sum().reset_index().sort_values('quantite', ascending=False).head(10), x='quantite', y='Dim', orientation='h'), use_container_width=True)
+        with section("Graphiques"): fig=px.bar(dfl, x='quantite', y='dimension_complete', orientation='h', hover_data=['ca']).update_yaxes(autorange="reversed")
+        st.plotly_chart(fig, use_container_width=True)
+    else: st.info("Aucune vente sur ces critères.")
 
 elif page == "Valeur Stock":
+    from jubapneu.valorisation import corriger
     st.title("💰 Stock Value")
-    st.metric("Total", f"{(df_stock['stock_actuel']*df_stock['pmp_achat'].fillna(0)).sum():,.2f} €")
+    c1, c2 = st.columns(2); c1.metric("Total", f"{(df_stock['stock_actuel']*df_stock['pmp_achat'].fillna(0)).sum():,.2f} €")
+    with section("Rejeu mouvements"): v = get_valorisation(); get_store().get('mouvements_stock')
+    d = st.date_input("Valorisation au", datetime.now(), format="DD/MM/YYYY")
+    c2.metric(f"Au {d:%d/%m/%Y} (journal)", f"{v.etat(d)['valeur'].sum():,.2f} €")
+    with st.expander("📅 Fins de mois"):
+        st.dataframe(v.valeurs_mensuelles().iloc[::-1], column_config={"mois": st.column_config.DateColumn("Fin de mois", format="DD/MM/YYYY"), "valeur": st.column_config.NumberColumn("Valeur", format="%.2f €")}, hide_index=True, use_container_width=True)
+    with st.expander("🩺 Écarts stock / mouvements"):
+        ec = v.ecarts(df_stock)
+        if ec.empty: st.success("Stock aligné sur le journal des mouvements.")
+        else:
+            st.dataframe(ec, use_container_width=True)
+            if st.button(f"🔧 Corriger {len(ec)} article(s)"):
+                corriger(supabase, ec); get_store().invalidate('articles'); st.success("OK"); time.sleep(1); st.rerun()
+
+# =========================================================
+# 🛰️ ÉTAT DE LA RÉPLIQUE
+# =========================================================
+if REPLICA:
+    et = get_store().etat()
+    synchro = f"synchro il y a {time.time() - et['synchro_le']:.0f} s" if et['synchro_le'] else "jamais synchronisée"
+    st.sidebar.caption(f"🛰️ Réplique locale · {et['attente']} vente(s) en attente · {synchro}")
+    if et['erreur']: st.sidebar.warning(f"Hors ligne : {et['erreur']}")
+    if et['echec']:
+        with st.sidebar.expander(f"⚠️ {et['echec']} vente(s) refusée(s)"):
+            st.dataframe(get_store().echecs()[['cree_le', 'erreur']], hide_index=True, use_container_width=True)
+            if st.button("🔁 Relancer"): get_store().relancer(); st.rerun()
+
+# =========================================================
+# 🐞 PANNEAU PERF
+# =========================================================
+if perf_actif:
+    m = st.session_state.perf_courante.terminer(); perf_archiver(m); activer(None); r = m.resume()
+    with st.sidebar.expander("🐞 Perf (ce rerun)", expanded=True):
+        st.metric("Rerun", f"{r['ms']:.0f} ms")
+        st.caption(f"{r['requetes']} requêtes · {r['ms_requetes']:.0f} ms · {r['lignes']} lignes · {r['octets']/1024:.0f} Ko")
+        if r['sections']: st.dataframe(pd.DataFrame(r['sections']), hide_index=True, use_container_width=True)
+        if r['detail']: st.dataframe(pd.DataFrame(r['detail']), hide_index=True, use_container_width=True)
+        st.download_button("📤 Export JSONL", "\n".join(json.dumps(h, ensure_ascii=False) for h in st.session_state.perf_hist), "perf.jsonl", "application/jsonl")
+        if st.button("Désactiver"): st.session_state.perf = False; st.rerun()
@@ -0,0 +1 @@
+# Benchmarks des chemins critiques sur un Supabase en mémoire (python -m bench.run)
@@ -0,0 +1,326 @@
+# =========================================================
+# 🧪 SUPABASE EN MÉMOIRE (pour les benchmarks)
+# =========================================================
+# Reproduit la chaîne table().select/eq/order/.../execute() et rpc() utilisée par app.py et jubapneu,
+# sur des DataFrames en mémoire, avec une latence simulée par aller-retour.
+import re
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+import pandas as pd
+
+from jubapneu.pmp import pmp_apres_achat
+
+# Jointures embarquées : (table, relation) -> clé étrangère
+EMBED_FK = {('factures_entete', 'clients'): 'client_id', ('factures_lignes', 'articles'): 'article_id'}
+
+
+class APIError(Exception):
+    def __init__(self, message, code=None):
+        super().__init__(message); self.message, self.code = message, code
+
+
+class Result:
+    def __init__(self, data, count=None): self.data, self.count = data, count
+
+
+class Stats:
+    def __init__(self): self.reset()
+
+    def reset(self):
+        self.appels = 0; self.lignes = 0; self.par_table = Counter()
+
+    def snapshot(self):
+        return {'appels': self.appels, 'lignes': self.lignes, 'par_table': dict(self.par_table)}
+
+
+def _records(df):
+    return df.astype(object).where(df.notna(), None).to_dict('records')
+
+
+def _split(s):
+    # Découpe sur les virgules de premier niveau (hors parenthèses et guillemets)
+    out, prof, cur, guil = [], 0, "", False
+    for ch in s:
+        if ch == '"': guil = not guil
+        if not guil and ch == '(': prof += 1
+        if not guil and ch == ')': prof -= 1
+        if ch == ',' and prof == 0 and not guil: out.append(cur.strip()); cur = ""
+        else: cur += ch
+    if cur.strip(): out.append(cur.strip())
+    return out
+
+
+def _valeur(v):
+    v = v.strip('"')
+    return int(v) if re.fullmatch(r"-?\d+", v) else v
+
+
+OPS = {'eq': lambda s, v: s == v, 'neq': lambda s, v: s != v, 'gt': lambda s, v: s > v, 'gte': lambda s, v: s >= v,
+       'lt': lambda s, v: s < v, 'lte': lambda s, v: s <= v}
+
+
+class Requete:
+    def __init__(self, db, table):
+        self.db, self.table = db, table
+        self.op = 'select'; self.cols = "*"; self.filtres = []; self.ordres = []
+        self.lim = None; self.rng = None; self.payload = None; self.conflit = None; self._neg = False; self.compter = False
+
+    # --- construction ---
+    def select(self, cols="*", count=None):
+        self.cols = cols; self.compter = count is not None; return self
+
+    def insert(self, rows):
+        self.op = 'insert'; self.payload = rows if isinstance(rows, list) else [rows]; return self
+
+    def update(self, values):
+        self.op = 'update'; self.payload = values; return self
+
+    def upsert(self, rows, on_conflict='id', **kw):
+        self.op = 'upsert'; self.payload = rows if isinstance(rows, list) else [rows]; self.conflit = on_conflict; return self
+
+    def delete(self):
+        self.op = 'delete'; return self
+
+    @property
+    def not_(self):
+        self._neg = True; return self
+
+    def _filtre(self, fn):
+        neg, self._neg = self._neg, False
+        self.filtres.append((lambda df: ~fn(df)) if neg else fn); return self
+
+    def eq(self, c, v): return self._filtre(lambda df: df[c] == v)
+    def neq(self, c, v): return self._filtre(lambda df: df[c] != v)
+    def gt(self, c, v): return self._filtre(lambda df: df[c] > v)
+    def gte(self, c, v): return self._filtre(lambda df: df[c] >= v)
+    def lt(self, c, v): return self._filtre(lambda df: df[c] < v)
+    def lte(self, c, v): return self._filtre(lambda df: df[c] <= v)
+    def in_(self, c, v): return self._filtre(lambda df: df[c].isin(list(v)))
+    def is_(self, c, v): return self._filtre(lambda df: df[c].isna() if v == 'null' else df[c] == (v == 'true'))
+
+    def or_(self, expr):
+        return self._filtre(lambda df: self._expr(df, expr, any))
+
+    def _expr(self, df, expr, comb):
+        masques = []
+        for t in _split(expr):
+            m = re.fullmatch(r"(and|or)\((.*)\)", t)
+            if m: masques.append(self._expr(df, m.group(2), all if m.group(1) == 'and' else any)); continue
+            col, op, val = t.split('.', 2)
+            masques.append(OPS[op](df[col], _valeur(val)))
+        out = masques[0]
+        for x in masques[1:]: out = (out & x) if comb is all else (out | x)
+        return out
+
+    def order(self, col, desc=False, **kw):
+        self.ordres.append((col, not desc)); return self
+
+    def limit(self, n): self.lim = n; return self
+    def range(self, a, b): self.rng = (a, b); return self
+
+    # --- exécution ---
+    def _masque(self, df):
+        m = pd.Series(True, index=df.index)
+        for f in self.filtres: m &= f(df).fillna(False).astype(bool)
+        return m
+
+    def _projeter(self, df):
+        cols, embeds = [], []
+        for c in _split(self.cols):
+            m = re.fullmatch(r"(\w+)\((.*)\)", c)
+            if m: embeds.append((m.group(1), m.group(2)))
+            elif c == '*': cols += [x for x in df.columns if x not in cols]
+            else: cols.append(c)
+        manquantes = [c for c in cols if c not in df.columns]
+        if manquantes: raise APIError(f"column {self.table}.{manquantes[0]} does not exist", '42703')
+        out = df[cols].copy()
+        for rel, sous in embeds:
+            cible = self.db.tables[rel]
+            if sous.strip() != '*': cible = cible[['id', *[x for x in _split(sous) if x != 'id']]]
+            par_id = dict(zip(cible['id'], _records(cible)))
+            out[rel] = df[EMBED_FK[(self.table, rel)]].map(lambda i: par_id.get(i))
+        return out
+
+    def execute(self):
+        with self.db.lock:
+            df = self.db.tables[self.table]
+            if self.op == 'select': data, total = self._select(df)
+            elif self.op == 'insert': data = self.db._inserer(self.table, self.payload)
+            elif self.op == 'upsert': data = self.db._upsert(self.table, self.payload, self.conflit)
+            elif self.op == 'update':
+                idx = df.index[self._masque(df)]
+                data = self.db._maj(self.table, idx, self.payload)
+            else:
+                m = self._masque(df); self._references(df[m]['id'])
+                data = _records(df[m]); self.db.tables[self.table] = df[~m]
+        self.db._aller_retour(self.table, data)
+        return Result(data, total if self.op == 'select' and self.compter else None)
+
+    def _references(self, ids):
+        # Clés étrangères : une ligne encore référencée ne se supprime pas (SQLSTATE 23503)
+        for (t, rel), fk in EMBED_FK.items():
+            if rel == self.table and self.db.tables[t][fk].isin(ids).any():
+                raise APIError(f'update or delete on table "{rel}" violates foreign key constraint on table "{t}"', '23503')
+
+    def _select(self, df):
+        df = df[self._masque(df)]; total = len(df)
+        if self.ordres: df = df.sort_values([c for c, _ in self.ordres], ascending=[a for _, a in self.ordres], kind='stable')
+        if self.rng: df = df.iloc[self.rng[0]:self.rng[1] + 1]
+        if self.lim is not None: df = df.iloc[:self.lim]
+        df = df.iloc[:self.db.max_lignes]  # plafond de lignes par réponse, comme l'API
+        return _records(self._projeter(df)), total
+
+
+class RequeteRpc:
+    def __init__(self, db, nom, params): self.db, self.nom, self.params = db, nom, params
+
+    def execute(self):
+        with self.db.lock: data = getattr(self.db, f"_rpc_{self.nom}")(**self.params)
+        self.db._aller_retour(f"rpc:{self.nom}", data)
+        return Result(data)
+
+
+class FakeSupabase:
+    """Client Supabase factice : `tables` = {nom: DataFrame}, `latence` = secondes ajoutées à chaque execute().
+
+    Comme l'API, une réponse de select ne dépasse pas `max_lignes` lignes.
+    """
+
+    def __init__(self, tables, latence=0.0, max_lignes=1000):
+        self.tables = {n: df.reset_index(drop=True) for n, df in tables.items()}
+        self.latence, self.max_lignes = latence, max_lignes
+        self.stats = Stats()
+        self.lock = threading.RLock()
+
+    def table(self, name): return Requete(self, name)
+    def rpc(self, name, params=None): return RequeteRpc(self, name, params or {})
+
+    def _aller_retour(self, cible, data):
+        if self.latence: time.sleep(self.latence)
+        n = len(data) if isinstance(data, list) else 1
+        with self.lock:
+            self.stats.appels += 1; self.stats.lignes += n; self.stats.par_table[cible] += 1
+
+    # --- écritures ---
+    def _maintenant(self):
+        return datetime.now().isoformat()
+
+    def _inserer(self, table, rows):
+        df = self.tables[table]
+        debut = int(df['id'].max()) + 1 if not df.empty else 1
+        now = self._maintenant()
+        new = pd.DataFrame([{**r, 'id': debut + k, 'created_at': r.get('created_at') or now,
+                             **({'updated_at': now} if 'updated_at' in df.columns else {})} for k, r in enumerate(rows)])
+        self.tables[table] = pd.concat([df, new], ignore_index=True)
+        return _records(new)
+
+    def _affecter(self, df, idx, c, v):
+        if c not in df.columns: df[c] = None
+        try: df.loc[idx, c] = v
+        except (TypeError, ValueError):
+            # Type incompatible (ex. None dans une colonne d'entiers) : la colonne passe en object
+            df[c] = df[c].astype(object); df.loc[idx, c] = v
+
+    def _maj(self, table, idx, values):
+        df = self.tables[table]
+        vals = {**values, **({'updated_at': self._maintenant()} if 'updated_at' in df.columns else {})}
+        for c, v in vals.items(): self._affecter(df, idx, c, v)
+        return _records(df.loc[idx])
+
+    def _upsert(self, table, rows, conflit):
+        df = self.tables[table]
+        pos = dict(zip(df[conflit], df.index))
+        maj = pd.DataFrame([r for r in rows if r.get(conflit) in pos])
+        neufs = [r for r in rows if r.get(conflit) not in pos]
+        out = []
+        if not maj.empty:
+            idx = [pos[k] for k in maj[conflit]]
+            if 'updated_at' in df.columns: maj['updated_at'] = self._maintenant()
+            for c in maj.columns:
+                if c != conflit: self._affecter(df, idx, c, maj[c].values)
+            out = _records(df.loc[idx])
+        return out + (self._inserer(table, neufs) if neufs else [])
+
+    # --- fonctions SQL (sql/*.sql) ---
+    def _rpc_creer_facture(self, p_client, p_facture, p_lignes):
+        fac = self.tables['factures_entete']; cle = p_facture.get('cle_idempotence')
+        if cle and 'cle_idempotence' in fac.columns and (fac['cle_idempotence'] == cle).any():
+            r = fac[fac['cle_idempotence'] == cle].iloc[0]
+            return {'facture_id': int(r['id']), 'client_id': int(r['client_id']), 'doublon': True}
+        art = self.tables['articles']; pos = dict(zip(art['id'], art.index))
+        dec = Counter()
+        for l in p_lignes:
+            if l['article_id'] is not None: dec[l['article_id']] += l['quantite']
+        ruptures = [art.at[pos[a], 'dimension_complete'] for a, q in dec.items() if art.at[pos[a], 'stock_actuel'] - q < 0]
+        if ruptures: raise APIError(f"Stock insuffisant : {', '.join(ruptures)}")
+        cid = p_client.get('id') or self._inserer('clients', [p_client])[0]['id']
+        fid = self._inserer('factures_entete', [{**p_facture, 'client_id': cid}])[0]['id']
+        self._inserer('factures_lignes', [{**l, 'facture_id': fid} for l in p_lignes])
+        for a, q in dec.items(): self._maj('articles', [pos[a]], {'stock_actuel': int(art.at[pos[a], 'stock_actuel']) - q})
+        self._inserer('mouvements_stock', [{'article_id': l['article_id'], 'type_mouvement': 'VENTE', 'quantite': -l['quantite'],
+                                            'lien_facture_fournisseur': f"Vente {p_facture['numero_facture']}", 'created_at': p_facture.get('created_at')} for l in p_lignes if l['article_id'] is not None])
+        jour = (p_facture.get('created_at') or self._maintenant())[:10]; cj = self.tables['ca_journalier']
+        ca = sum(l['quantite'] * l['prix_vente_unitaire'] for l in p_lignes); cout = sum(l['quantite'] * (l['cout_achat_historique'] or 0) for l in p_lignes)
+        if (cj['jour'] == jour).any():
+            i = cj.index[cj['jour'] == jour][0]
+            cj.loc[i, ['nb_factures', 'ca_ttc', 'cout_achat']] += [1, ca, cout]
+        else: self.tables['ca_journalier'] = pd.concat([cj, pd.DataFrame([{'jour': jour, 'nb_factures': 1, 'ca_ttc': ca, 'cout_achat': cout}])], ignore_index=True)
+        return {'facture_id': fid, 'client_id': cid}
+
+    def _rpc_creer_factures_lot(self, p_lot):
+        out = []
+        for v in p_lot:
+            try: out.append({**self._rpc_creer_facture(v['p_client'], {**v['p_facture'], 'cle_idempotence': v['cle']}, v['p_lignes']), 'cle': v['cle']})
+            except APIError as e: out.append({'cle': v['cle'], 'erreur': e.message})
+        return out
+
+    def _rpc_entrer_achats(self, p_lignes, p_fichier, p_cle):
+        mv = self.tables['mouvements_stock']
+        if 'cle_import' in mv.columns and (mv['cle_import'] == p_cle).any():
+            return [{'nb_articles': len(p_lignes), 'nb_crees': 0, 'doublon': True}]
+        l = pd.DataFrame([{**x['article'], 'quantite': x['quantite'], 'prix': x['prix']} for x in p_lignes])
+        art = self.tables['articles']
+        ids = art.sort_values('id').drop_duplicates(['dimension_complete', 'marque']).set_index(['dimension_complete', 'marque'])['id']
+        cles = list(zip(l['dimension_complete'], l['marque']))
+        neufs = [i for i, k in enumerate(cles) if k not in ids.index]
+        if neufs:
+            cols = [c for c in l.columns if c not in ('quantite', 'prix')]
+            self._inserer('articles', [{**{c: l.at[i, c] for c in cols}, 'stock_actuel': 0, 'pmp_achat': l.at[i, 'prix']} for i in neufs])
+            art = self.tables['articles']
+            ids = art.sort_values('id').drop_duplicates(['dimension_complete', 'marque']).set_index(['dimension_complete', 'marque'])['id']
+        l['article_id'] = [int(ids[k]) for k in cles]
+        pos = dict(zip(art['id'], art.index)); idx = [pos[i] for i in l['article_id']]
+        st = art.loc[idx, 'stock_actuel'].fillna(0).astype(float).values; ns = st + l['quantite'].values
+        self._affecter(art, idx, 'pmp_achat', pmp_apres_achat(st, art.loc[idx, 'pmp_achat'].astype(float).values, l['quantite'].values, l['prix'].values))
+        self._affecter(art, idx, 'stock_actuel', ns.astype(int))
+        if 'updated_at' in art.columns: art.loc[idx, 'updated_at'] = self._maintenant()
+        self._inserer('mouvements_stock', [{'article_id': a, 'type_mouvement': 'ACHAT', 'quantite': q, 'prix_achat_unitaire': p,
+                                            'lien_facture_fournisseur': p_fichier, 'cle_import': p_cle}
+                                           for a, q, p in zip(l['article_id'], l['quantite'], l['prix'])])
+        return [{'nb_articles': len(p_lignes), 'nb_crees': len(neufs), 'doublon': False}]
+
+    def _rpc_corriger_stock(self, p_articles):
+        art = self.tables['articles']; pos = dict(zip(art['id'], art.index))
+        tot = self.tables['mouvements_stock'].groupby('article_id')['quantite'].sum()
+        out = []
+        for c in p_articles:
+            v = {'stock_actuel': int(tot.get(c['id'], 0))}
+            if c.get('pmp_achat') is not None: v['pmp_achat'] = c['pmp_achat']
+            out += self._maj('articles', [pos[c['id']]], v)
+        return out
+
+    def _rpc_top_ventes(self, p_debut=None, p_fin=None, p_saisons=None, p_marques=None, p_limite=10):
+        l = self.tables['factures_lignes'].dropna(subset=['article_id'])
+        f = self.tables['factures_entete'][['id', 'created_at']].rename(columns={'id': 'facture_id'})
+        a = self.tables['articles'][['id', 'dimension_complete', 'saison', 'marque']].rename(columns={'id': 'article_id'})
+        d = l.merge(f, on='facture_id').merge(a, on='article_id')
+        if p_debut: d = d[d['created_at'] >= p_debut]
+        if p_fin: d = d[d['created_at'] < p_fin]
+        if p_saisons: d = d[d['saison'].isin(p_saisons)]
+        if p_marques: d = d[d['marque'].isin(p_marques)]
+        d = d.assign(ca=d['quantite'] * d['prix_vente_unitaire'])
+        g = d.groupby('dimension_complete', as_index=False).agg(quantite=('quantite', 'sum'), ca=('ca', 'sum'))
+        return _records(g.sort_values('quantite', ascending=False).head(p_limite))
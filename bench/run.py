@@ -0,0 +1,170 @@
+# =========================================================
+# ⏱️ BENCHMARKS DES CHEMINS CRITIQUES
+# =========================================================
+#   python -m bench.run                              # échelle réaliste, 30 ms par aller-retour
+#   python -m bench.run --latence 0 --json ref.json  # enregistre une référence
+#   python -m bench.run --reference ref.json         # échoue (code 1) si un chemin régresse
+import argparse
+import json
+import statistics
+import sys
+import time
+
+import pandas as pd
+
+from jubapneu.factures import creer_facture, numero_facture
+from jubapneu.importer import importer_facture
+from jubapneu.pagination import PageurKeyset
+from jubapneu.parsing import analyser_ligne_deldo
+from jubapneu.stats import RollupCA, top_ventes
+from jubapneu.store import DataStore
+from jubapneu.valorisation import ValorisationStock
+
+from .fake_supabase import FakeSupabase
+from .seed import generer
+
+SCENARIOS = []
+
+
+def scenario(nom, repetable=True):
+    def deco(fn):
+        SCENARIOS.append((nom, fn, repetable)); return fn
+    return deco
+
+
+# --- DATA ---
+@scenario("load_all_data (froid)")
+def _load_froid(db, ctx):
+    ctx['store'] = store = DataStore(db)
+    store.get_many('articles', 'clients', 'services')
+
+
+@scenario("load_all_data (delta après écriture)")
+def _load_delta(db, ctx):
+    store = ctx.setdefault('store', DataStore(db))
+    store.invalidate('articles', 'clients', 'services')
+    store.get_many('articles', 'clients', 'services')
+
+
+# --- STOCK ---
+@scenario("import Deldo (200 lignes)", repetable=False)
+def _import(db, ctx):
+    art = db.tables['articles'].sample(150, random_state=1)
+    desc = [f"{r.marque} {r.largeur} {r.hauteur} R {r.diametre} {r.charge} {r.vitesse} X" for r in art.itertuples()]
+    desc += [f"NOUVELLE {200 + i % 9 * 10} 55 R 17 94 V X" for i in range(50)]
+    found = []
+    for i, d in enumerate(desc):
+        inf = analyser_ligne_deldo(d)
+        found.append({"Desc": inf['dimension_complete'], "Marque": inf['marque'], "Qté": 1 + i % 4, "Prix": 50.0 + i, "_inf": inf})
+    importer_facture(db, found, "bench.pdf")
+
+
+@scenario("Historique Mouvements (2 pages)")
+def _historique(db, ctx):
+    pg = PageurKeyset(db, 'mouvements_stock', '*', (), 100)
+    pg.page(0); pg.page(1)
+    # Le préchargement de la page 3 compte ici, pas dans le scénario suivant
+    for f in list(pg.pages.values()): f.result()
+
+
+# --- FACTURATION ---
+@scenario("validation facture (5 articles)")
+def _validation(db, ctx):
+    art = db.tables['articles']
+    art = art[art['stock_actuel'] > 10].head(5)
+    panier = [{"type": "PNEU", "id": int(r.id), "desc": r.dimension_complete, "qte": 1, "prix": 90.0, "cout": float(r.pmp_achat)} for r in art.itertuples()]
+    creer_facture(db, {"id": 1, "nom": "Client 00001"}, panier, 450.0, numero_facture())
+
+
+@scenario("generer_pdf (5 lignes)")
+def _pdf_court(db, ctx):
+    from jubapneu.pdf import generer_pdf
+    generer_pdf(1, {"nom": "Client"}, [{"desc": f"Pneu {i}", "qte": 2, "prix": 90.0} for i in range(5)], 900.0, "FV-BENCH")
+
+
+@scenario("generer_pdf (150 lignes, paginé)")
+def _pdf_long(db, ctx):
+    from jubapneu.pdf import generer_pdf
+    generer_pdf(1, {"nom": "Client"}, [{"desc": f"Pneu {i}", "qte": 2, "prix": 90.0} for i in range(150)], 27000.0, "FV-BENCH")
+
+
+# --- STATISTIQUES ---
+@scenario("Chiffre d'Affaires (Jour/Semaine/Mois)")
+def _ca(db, ctx):
+    r = RollupCA(db); r.rafraichir()
+    for f in ('D', 'W', 'M'): r.serie(f)
+
+
+@scenario("Top Ventes")
+def _top(db, ctx):
+    top_ventes(db, limite=10)
+
+
+@scenario("Valeur Stock")
+def _valeur(db, ctx):
+    s = ctx.setdefault('store', DataStore(db)).get('articles')
+    (s['stock_actuel'] * s['pmp_achat'].fillna(0)).sum()
+
+
+@scenario("Valeur Stock au (rejeu + écarts)")
+def _valorisation(db, ctx):
+    store = ctx.setdefault('store', DataStore(db))
+    if 'valo' not in ctx: ctx['valo'] = ValorisationStock(); store.subscribe('mouvements_stock', ctx['valo'].charger)
+    store.invalidate('mouvements_stock'); store.get('mouvements_stock')
+    ctx['valo'].etat(pd.Timestamp.now() - pd.Timedelta(days=200)); ctx['valo'].ecarts(store.get('articles'))
+
+
+def executer(db, repetitions):
+    ctx, res = {}, []
+    for nom, fn, repetable in SCENARIOS:
+        temps, appels, lignes = [], [], []
+        for _ in range(repetitions if repetable else 1):
+            db.stats.reset(); t0 = time.perf_counter()
+            fn(db, ctx)
+            temps.append(time.perf_counter() - t0); appels.append(db.stats.appels); lignes.append(db.stats.lignes)
+        res.append({'scenario': nom, 'ms': round(statistics.median(temps) * 1000, 1), 'appels': max(appels), 'lignes': max(lignes)})
+    return res
+
+
+def comparer(res, ref, tolerance):
+    ref = {r['scenario']: r for r in ref}
+    regressions = []
+    for r in res:
+        b = ref.get(r['scenario'])
+        if not b: continue
+        if r['appels'] > b['appels']: regressions.append(f"{r['scenario']} : {b['appels']} -> {r['appels']} allers-retours")
+        if r['ms'] > b['ms'] * tolerance: regressions.append(f"{r['scenario']} : {b['ms']} -> {r['ms']} ms")
+    return regressions
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(prog="bench.run", description="Benchmarks JubaPneu sur Supabase en mémoire.")
+    p.add_argument("--latence", type=float, default=0.03, help="Secondes simulées par aller-retour (défaut 0.03).")
+    p.add_argument("--articles", type=int, default=10_000)
+    p.add_argument("--mouvements", type=int, default=500_000)
+    p.add_argument("--factures", type=int, default=20_000)
+    p.add_argument("--repetitions", type=int, default=3)
+    p.add_argument("--filtre", help="Ne lance que les scénarios contenant ce texte.")
+    p.add_argument("--json", help="Écrit les résultats dans ce fichier.")
+    p.add_argument("--reference", help="Résultats de référence (JSON) à ne pas dépasser.")
+    p.add_argument("--tolerance", type=float, default=1.25, help="Marge sur le temps par rapport à la référence.")
+    args = p.parse_args(argv)
+
+    if args.filtre: SCENARIOS[:] = [s for s in SCENARIOS if args.filtre.lower() in s[0].lower()]
+    t0 = time.perf_counter()
+    db = FakeSupabase(generer(args.articles, args.mouvements, factures=args.factures), latence=args.latence)
+    print(f"Données générées en {time.perf_counter() - t0:.1f} s", file=sys.stderr)
+
+    res = executer(db, args.repetitions)
+    print(pd.DataFrame(res).to_string(index=False))
+    if args.json:
+        with open(args.json, 'w') as f: json.dump(res, f, indent=2, ensure_ascii=False)
+    if args.reference:
+        with open(args.reference) as f: regressions = comparer(res, json.load(f), args.tolerance)
+        for r in regressions: print(f"RÉGRESSION {r}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,69 @@
+# =========================================================
+# 🌱 JEU DE DONNÉES SYNTHÉTIQUE
+# =========================================================
+import numpy as np
+import pandas as pd
+
+MARQUES = ["MICHELIN", "CONTINENTAL", "BRIDGESTONE", "GOODYEAR", "PIRELLI", "HANKOOK", "NEXEN", "KUMHO", "FALKEN", "TRIANGLE"]
+SAISONS = ["Été", "Hiver", "4 Saisons"]
+VITESSES = list("HTVWY")
+JOURS_HISTORIQUE = 3 * 365
+
+
+def _dates(rng, n, fin):
+    # Horodatages ISO triés sur JOURS_HISTORIQUE jours, même format que created_at côté API
+    s = np.sort(rng.integers(0, JOURS_HISTORIQUE * 86400, n))
+    return (fin - pd.to_timedelta(JOURS_HISTORIQUE * 86400 - s, unit='s')).strftime('%Y-%m-%dT%H:%M:%S').tolist()
+
+
+def generer(articles=10_000, mouvements=500_000, clients=2_000, factures=20_000, graine=42):
+    """Catalogue de pneus, mouvements, clients, factures (+ lignes), services et cumuls CA journaliers."""
+    rng = np.random.default_rng(graine)
+    fin = pd.Timestamp.now().floor('s')
+    ids = np.arange(1, articles + 1)
+
+    larg = rng.choice(np.arange(155, 295, 10), articles); haut = rng.choice(np.arange(35, 85, 5), articles)
+    diam = rng.choice(np.arange(13, 22), articles); charge = rng.integers(75, 111, articles).astype(str)
+    vit = rng.choice(VITESSES, articles)
+    dims = [f"{l}/{h} R{d} {c}{v}" for l, h, d, c, v in zip(larg, haut, diam, charge, vit)]
+    t_art = pd.DataFrame({'id': ids, 'dimension_complete': dims, 'largeur': larg, 'hauteur': haut, 'diametre': diam, 'charge': charge, 'vitesse': vit,
+                          'marque': rng.choice(MARQUES, articles), 'saison': rng.choice(SAISONS, articles),
+                          'stock_actuel': rng.integers(0, 40, articles), 'pmp_achat': rng.uniform(30, 200, articles).round(2)})
+    t_art['created_at'] = t_art['updated_at'] = _dates(rng, articles, fin)
+
+    achat = rng.random(mouvements) < 0.4
+    q = rng.integers(1, 9, mouvements)
+    t_mouv = pd.DataFrame({'id': np.arange(1, mouvements + 1), 'article_id': rng.choice(ids, mouvements),
+                           'type_mouvement': np.where(achat, 'ACHAT', 'VENTE'), 'quantite': np.where(achat, q, -q),
+                           'prix_achat_unitaire': np.where(achat, rng.uniform(30, 200, mouvements).round(2), np.nan),
+                           'lien_facture_fournisseur': np.where(achat, 'deldo.pdf', 'Vente'), 'created_at': _dates(rng, mouvements, fin)})
+
+    t_cli = pd.DataFrame({'id': np.arange(1, clients + 1), 'nom': [f"Client {i:05d}" for i in range(1, clients + 1)],
+                          'telephone': '0600000000', 'email': None, 'adresse': '1 rue du Test', 'code_postal': '54310', 'ville': 'Homécourt', 'siret': None})
+    t_cli['created_at'] = t_cli['updated_at'] = _dates(rng, clients, fin)
+
+    t_svc = pd.DataFrame({'id': np.arange(1, 21), 'description': [f"Service {i:02d}" for i in range(1, 21)],
+                          'prix_unitaire': rng.uniform(10, 60, 20).round(2), 'categorie': 'Montage'})
+    t_svc['created_at'] = t_svc['updated_at'] = fin.isoformat()
+
+    fids = np.arange(1, factures + 1)
+    nl = rng.integers(1, 4, factures)
+    lf = np.repeat(fids, nl); n = len(lf)
+    pneu = rng.random(n) < 0.8
+    t_lig = pd.DataFrame({'id': np.arange(1, n + 1), 'facture_id': lf, 'article_id': np.where(pneu, rng.choice(ids, n), np.nan),
+                          'quantite': rng.integers(1, 5, n), 'prix_vente_unitaire': rng.uniform(15, 280, n).round(2)})
+    t_lig['cout_achat_historique'] = np.where(pneu, (t_lig['prix_vente_unitaire'] / 1.4).round(2), 0.0)
+    t_lig['article_id'] = t_lig['article_id'].astype('Int64')
+    tot = (t_lig['quantite'] * t_lig['prix_vente_unitaire']).groupby(t_lig['facture_id']).sum()
+    dates_f = _dates(rng, factures, fin)
+    t_fac = pd.DataFrame({'id': fids, 'client_id': rng.choice(t_cli['id'], factures), 'total_ttc': tot.reindex(fids).values.round(2),
+                          'numero_facture': [f"FV-{d[2:4]}{d[5:7]}-{i:06d}" for i, d in zip(fids, dates_f)], 'statut': 'Payée', 'created_at': dates_f})
+
+    j = t_lig.merge(t_fac[['id', 'created_at']].rename(columns={'id': 'facture_id'}), on='facture_id')
+    j['jour'] = j['created_at'].str[:10]
+    t_ca = j.assign(ca=j['quantite'] * j['prix_vente_unitaire'], cout=j['quantite'] * j['cout_achat_historique']).groupby('jour').agg(ca_ttc=('ca', 'sum'), cout_achat=('cout', 'sum'))
+    t_ca['nb_factures'] = t_fac.groupby(t_fac['created_at'].str[:10]).size()
+    t_ca = t_ca.reset_index()
+
+    return {'articles': t_art, 'mouvements_stock': t_mouv, 'clients': t_cli, 'services': t_svc,
+            'factures_entete': t_fac, 'factures_lignes': t_lig, 'ca_journalier': t_ca}
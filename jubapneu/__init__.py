@@ -0,0 +1,18 @@
+# Cœur métier JubaPneu (sans dépendance Streamlit).
+# Les sous-modules sont importés à la demande : `import jubapneu` ne charge ni pandas, ni reportlab, ni supabase.
+#   jubapneu.store       cache des tables Supabase
+#   jubapneu.chargement  lecture en masse par pages parallèles
+#   jubapneu.replica     réplique SQLite locale et file d'envoi des ventes
+#   jubapneu.importer    import facture fournisseur (PMP, écritures en masse)
+#   jubapneu.lots        écritures par lots avec reprise
+#   jubapneu.editeur     enregistrement différentiel des éditeurs (clients, services)
+#   jubapneu.parsing     analyse des PDF fournisseur
+#   jubapneu.factures    création de facture (RPC) et lignes
+#   jubapneu.pdf         rendu des factures
+#   jubapneu.recherche   index de recherche par dimension
+#   jubapneu.stats       Top Ventes, CA journalier
+#   jubapneu.pagination  pagination par clé
+#   jubapneu.pmp         calcul du PMP
+#   jubapneu.valorisation  rejeu stock / PMP, valorisation à date, écarts
+#   jubapneu.connexion   client Supabase hors Streamlit
+#   jubapneu.cli         ligne de commande (python -m jubapneu)
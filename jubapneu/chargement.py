@@ -0,0 +1,45 @@
+# =========================================================
+# 🚚 LECTURE EN MASSE (PAGES PARALLÈLES)
+# =========================================================
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+
+import pandas as pd
+
+from .instrumentation import propager
+
+PAGE = 1000   # limite de lignes par requête côté API
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="pages")
+
+
+def _requete(client, table, select, filtres, ordre, count=None):
+    q = client.table(table).select(select, count=count) if count else client.table(table).select(select)
+    for op, col, val in filtres: q = getattr(q, op)(col, val)
+    for col, desc in ordre: q = q.order(col, desc=desc)
+    return q
+
+
+def lire_lignes(client, table, select="*", filtres=(), ordre=(), page=PAGE, cle='id'):
+    """Toutes les lignes de `table` : la première page donne le total (count exact), les suivantes partent en parallèle.
+
+    `filtres` : tuples (méthode, colonne, valeur) comme PageurKeyset ; `ordre` : (colonne, desc), départagé par `cle`
+    (colonne unique) pour que les plages ne se recouvrent pas.
+    """
+    ordre = (*ordre, (cle, False)) if cle and all(c != cle for c, _ in ordre) else tuple(ordre)
+    args = (client, table, select, tuple(filtres), ordre)
+    res = _requete(*args, count='exact').range(0, page - 1).execute()
+    if len(res.data) < page: return res.data
+    total = getattr(res, 'count', None)
+    if total is None:
+        # Total inconnu : page par page jusqu'à une page incomplète
+        pages, a = [res.data], page
+        while len(pages[-1]) == page:
+            pages.append(_requete(*args).range(a, a + page - 1).execute().data); a += page
+        return list(chain.from_iterable(pages))
+    lire = propager(lambda a: _requete(*args).range(a, a + page - 1).execute().data)
+    futures = [_executor.submit(lire, a) for a in range(page, total, page)]
+    return list(chain(res.data, *(f.result() for f in futures)))
+
+
+def lire_table(client, table, select="*", filtres=(), ordre=(), page=PAGE, cle='id'):
+    return pd.DataFrame.from_records(lire_lignes(client, table, select, filtres, ordre, page, cle))
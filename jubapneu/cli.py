@@ -0,0 +1,62 @@
+# =========================================================
+# 🖥️ LIGNE DE COMMANDE (traitements par lot, sans Streamlit)
+# =========================================================
+#   python -m jubapneu import-deldo facture.pdf [--dry-run]
+#   python -m jubapneu export-factures --du 2026-09-01 --au 2026-09-30 [--pdf] -o septembre.zip
+import argparse
+import hashlib
+import sys
+from datetime import date
+
+
+def _import_deldo(args):
+    from .parsing import parser_pdf
+    with open(args.fichier, 'rb') as f: data = f.read()
+    found = []
+    for lus, total, found in parser_pdf(data): print(f"\rAnalyse... {lus}/{total} pages", end="", file=sys.stderr)
+    print(file=sys.stderr)
+    print(f"{len(found)} lignes reconnues")
+    if args.dry_run or not found: return 0
+    from .connexion import creer_client
+    from .importer import importer_facture
+    rep = importer_facture(creer_client(), found, args.nom or args.fichier.rsplit('/', 1)[-1], empreinte=hashlib.sha256(data).hexdigest())
+    if rep['deja_importes']: print(f"{rep['deja_importes']} référence(s) déjà importée(s) avec ce fichier : ignorées")
+    print(f"Importé : {rep['articles']} références ({rep['crees']} nouvelles)")
+    return 0
+
+
+def _export_factures(args):
+    from .connexion import creer_client
+    from .factures import lignes_factures
+    from .pagination import PageurKeyset, filtres_periode
+    from .pdf import generer_lot
+    client = creer_client()
+    factures = list(PageurKeyset(client, 'factures_entete', '*, clients(*)', filtres_periode(args.du, args.au), 500).tout())[::-1]
+    if not factures: print("Aucune facture sur la période.", file=sys.stderr); return 1
+    lignes = lignes_factures(client, [f['id'] for f in factures])
+    lot = [{"id": f['id'], "client": f['clients'], "lignes": lignes[f['id']], "total_ttc": float(f['total_ttc']),
+            "numero_facture": f['numero_facture'], "date": date.fromisoformat(f['created_at'][:10])} for f in factures]
+    with open(args.sortie, 'wb') as out: out.write(generer_lot(lot, fusion=args.pdf).getvalue())
+    print(f"{len(lot)} factures -> {args.sortie}")
+    return 0
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(prog="jubapneu", description="Traitements JubaPneu hors interface.")
+    sub = p.add_subparsers(dest="commande", required=True)
+
+    imp = sub.add_parser("import-deldo", help="Importe une facture fournisseur Deldo (PDF).")
+    imp.add_argument("fichier")
+    imp.add_argument("--nom", help="Référence enregistrée dans les mouvements (défaut : nom du fichier).")
+    imp.add_argument("--dry-run", action="store_true", help="Analyse seulement, sans écrire en base.")
+    imp.set_defaults(func=_import_deldo)
+
+    exp = sub.add_parser("export-factures", help="Exporte les factures d'une période (ZIP ou PDF unique).")
+    exp.add_argument("--du", type=date.fromisoformat, required=True)
+    exp.add_argument("--au", type=date.fromisoformat, required=True)
+    exp.add_argument("--pdf", action="store_true", help="Un seul PDF fusionné au lieu d'un ZIP.")
+    exp.add_argument("-o", "--sortie", required=True)
+    exp.set_defaults(func=_export_factures)
+
+    args = p.parse_args(argv)
+    return args.func(args)
@@ -0,0 +1,22 @@
+# =========================================================
+# 🔌 CONNEXION SUPABASE
+# =========================================================
+import os
+
+
+def lire_cles():
+    """(url, key) depuis les variables d'environnement, sinon secrets_config.py ; (None, None) si introuvables."""
+    if os.environ.get("SUPABASE_URL"): return os.environ["SUPABASE_URL"], os.environ.get("SUPABASE_KEY")
+    try:
+        import secrets_config
+        return secrets_config.SUPABASE_URL, secrets_config.SUPABASE_KEY
+    except ImportError:
+        return None, None
+
+
+def creer_client(url=None, key=None):
+    if not url: url, key = lire_cles()
+    if not url: raise RuntimeError("Clés Supabase introuvables (SUPABASE_URL / SUPABASE_KEY).")
+    # Import différé : supabase est lourd à charger
+    from supabase import create_client
+    return create_client(url, key)
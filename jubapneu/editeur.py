@@ -0,0 +1,38 @@
+# =========================================================
+# ✏️ ENREGISTREMENT DES st.data_editor PAR DIFFÉRENCE
+# =========================================================
+import pandas as pd
+
+from .lots import ecrire_par_lots, records
+
+SUPPR_CHUNK = 100    # in_() passe dans l'URL
+
+
+def diff_editeur(base, etat, cle='id'):
+    """(maj, ajouts, suppressions) d'après l'état d'édition d'un data_editor affiché sur `base`.
+
+    `etat` = st.session_state[key] : edited_rows {position: {col: val}}, added_rows [{col: val}], deleted_rows [position].
+    Les mises à jour sont des lignes complètes (un upsert partiel échoue sur les colonnes NOT NULL).
+    """
+    base = base.reset_index(drop=True)
+    suppr = {int(p) for p in etat.get('deleted_rows', [])}
+    modifs = {int(p): v for p, v in etat.get('edited_rows', {}).items() if v and int(p) not in suppr}
+    pos = sorted(modifs)
+    maj = [{**r, **modifs[p]} for p, r in zip(pos, records(base.iloc[pos].drop(columns=['created_at', 'updated_at'], errors='ignore')))]
+    neufs = [{c: v for c, v in r.items() if c != cle} for r in etat.get('added_rows', [])]
+    neufs = [r for r in neufs if any(v not in (None, "") for v in r.values())]
+    ajouts = records(pd.DataFrame(neufs)) if neufs else []
+    return maj, ajouts, base.iloc[sorted(suppr)][cle].astype(int).tolist()
+
+
+def enregistrer(client, table, maj=(), ajouts=(), suppressions=()):
+    """Un delete in_() pour les suppressions, un upsert par lot pour les lignes modifiées, un insert pour les ajouts.
+
+    Les suppressions passent en premier : une suppression refusée (client ayant des factures) arrête tout
+    avant que les modifications et ajouts ne soient écrits.
+    """
+    if suppressions: ecrire_par_lots(lambda lot: client.table(table).delete().in_('id', lot), list(suppressions), "Suppressions", chunk=SUPPR_CHUNK)
+    if maj: ecrire_par_lots(lambda lot: client.table(table).upsert(lot, on_conflict='id'), list(maj), "Modifications")
+    # Insert nu : pas de nouvelle tentative, un lot dont la réponse s'est perdue serait créé deux fois
+    if ajouts: ecrire_par_lots(lambda lot: client.table(table).insert(lot), list(ajouts), "Ajouts", tentatives=1)
+    return {'modifiees': len(maj), 'ajoutees': len(ajouts), 'supprimees': len(suppressions)}
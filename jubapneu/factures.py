@@ -0,0 +1,33 @@
+# =========================================================
+# 🧾 FACTURES
+# =========================================================
+from datetime import datetime
+
+CHAMPS_CLIENT = ['nom', 'telephone', 'adresse', 'code_postal', 'ville']
+
+
+def numero_facture(now=None):
+    return f"FV-{(now or datetime.now()).strftime('%y%m-%H%M')}"
+
+
+def payload_facture(cli, panier, total_ttc, numero):
+    # Client existant : l'id suffit ; sinon les champs saisis (cf. creer_facture dans sql/002_creer_facture.sql)
+    p_client = {'id': int(cli['id'])} if cli.get('id') else {k: cli.get(k) or None for k in CHAMPS_CLIENT}
+    p_lignes = [{'article_id': int(it['id']) if it['type'] == "PNEU" else None, 'quantite': int(it['qte']),
+                 'prix_vente_unitaire': float(it['prix']), 'cout_achat_historique': float(it['cout'] or 0)} for it in panier]
+    return {'p_client': p_client, 'p_facture': {'total_ttc': float(total_ttc), 'numero_facture': numero, 'statut': "Payée"}, 'p_lignes': p_lignes}
+
+
+def creer_facture(client, cli, panier, total_ttc, numero):
+    """Crée la facture complète en un appel RPC transactionnel ; retourne {'facture_id', 'client_id'}."""
+    return client.rpc('creer_facture', payload_facture(cli, panier, total_ttc, numero)).execute().data
+
+
+def lignes_factures(client, facture_ids, chunk=100):
+    """Lignes (avec l'article) de plusieurs factures en une requête par lot de `chunk` ids : {facture_id: [lignes]}."""
+    out = {int(i): [] for i in facture_ids}
+    ids = list(out)
+    for i in range(0, len(ids), chunk):
+        for l in client.table('factures_lignes').select('*, articles(marque, dimension_complete)').in_('facture_id', ids[i:i + chunk]).execute().data:
+            out[l['facture_id']].append(l)
+    return out
@@ -0,0 +1,45 @@
+# =========================================================
+# 📥 IMPORT FACTURE FOURNISSEUR (EN MASSE)
+# =========================================================
+import hashlib
+import json
+
+import pandas as pd
+
+from .lots import ecrire_par_lots, records
+
+ARTICLE_COLS = ['dimension_complete', 'largeur', 'hauteur', 'diametre', 'charge', 'vitesse', 'marque', 'saison']
+CLE = ['dimension_complete', 'marque']
+
+
+def regrouper_lignes(found):
+    # Une même référence peut apparaître plusieurs fois sur la facture : une seule ligne, prix moyen pondéré
+    df = pd.DataFrame([{**{c: it['_inf'][c] for c in ARTICLE_COLS}, 'qte': it['Qté'], 'prix': it['Prix']} for it in found])
+    df['montant'] = df['qte'] * df['prix']
+    g = df.groupby(CLE, as_index=False, sort=False).agg(
+        **{c: (c, 'first') for c in ARTICLE_COLS if c not in CLE}, qte=('qte', 'sum'), montant=('montant', 'sum'))
+    g['prix'] = (g['montant'] / g['qte'].where(g['qte'] != 0)).round(4)
+    return g.drop(columns='montant')
+
+
+def cle_lot(empreinte, lot):
+    # Même fichier, même regroupement -> mêmes clés : un import relancé saute les lots déjà passés
+    return f"{empreinte}:{hashlib.sha256(json.dumps(lot, sort_keys=True, default=str).encode()).hexdigest()[:16]}"
+
+
+def importer_facture(client, found, nom_fichier, progress=None, empreinte=None):
+    """Import d'une facture Deldo : un appel entrer_achats par lot, rien d'autre.
+
+    Création des articles manquants, stock et PMP sont appliqués côté base, en place et de façon rejouable
+    (sql/009_entrer_achats_idempotent.sql) : un lot déjà appliqué est ignoré, on peut donc retenter sans risque.
+    `empreinte` identifie le fichier (sha256 du PDF) ; à défaut, son nom.
+    """
+    progress = progress or (lambda x: None)
+    lignes = regrouper_lignes(found); progress(0.25)
+    achats = [{'article': {c: r[c] for c in ARTICLE_COLS}, 'quantite': r['qte'], 'prix': r['prix']} for r in records(lignes)]
+    cle = empreinte or nom_fichier
+    rep = ecrire_par_lots(lambda lot: client.rpc('entrer_achats', {'p_lignes': lot, 'p_fichier': nom_fichier, 'p_cle': cle_lot(cle, lot)}),
+                          achats, "Entrée en stock")
+    progress(1.0)
+    return {'lignes': len(found), 'articles': len(lignes), 'crees': sum(r['nb_crees'] for r in rep),
+            'deja_importes': sum(r['nb_articles'] for r in rep if r['doublon'])}
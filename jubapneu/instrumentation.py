@@ -0,0 +1,127 @@
+# =========================================================
+# 🐞 INSTRUMENTATION (TEMPS PAR RERUN, REQUÊTES SUPABASE)
+# =========================================================
+# Opt-in : sans mesure active sur le thread courant, le client instrumenté se contente de déléguer.
+# Les requêtes lancées depuis un autre thread (préchargement de pagination) ne sont pas comptées, sauf via propager().
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+_local = threading.local()
+
+ECRITURES = ('insert', 'update', 'upsert', 'delete')
+OPERATIONS = ('select', *ECRITURES)
+
+
+def _taille(obj):
+    try: return len(json.dumps(obj, default=str).encode())
+    except (TypeError, ValueError): return 0
+
+
+class Mesure:
+    """Temps des sections et requêtes d'un rerun."""
+
+    def __init__(self, page=""):
+        self.page = page
+        self.horodatage = time.time()
+        self.t0 = time.perf_counter(); self.derniere = self.t0
+        self.duree = None; self.interrompu = False
+        self.sections = []   # (nom, ms)
+        self.requetes = []   # (cible, op, ms, lignes, octets)
+
+    def _noter(self):
+        self.derniere = time.perf_counter()
+
+    def requete(self, cible, op, ms, lignes, octets):
+        self.requetes.append((cible, op, round(ms, 1), lignes, octets)); self._noter()
+
+    def terminer(self, interrompu=False):
+        # Rerun coupé par st.rerun()/st.stop() : on s'arrête au dernier évènement connu
+        if self.duree is None:
+            self.interrompu = interrompu
+            self.duree = ((self.derniere if interrompu else time.perf_counter()) - self.t0) * 1000
+        return self
+
+    def resume(self):
+        return {'horodatage': self.horodatage, 'page': self.page, 'ms': round(self.duree or 0, 1), 'interrompu': self.interrompu,
+                'requetes': len(self.requetes), 'lignes': sum(r[3] for r in self.requetes), 'octets': sum(r[4] for r in self.requetes),
+                'ms_requetes': round(sum(r[2] for r in self.requetes), 1),
+                'sections': [{'nom': n, 'ms': ms} for n, ms in self.sections],
+                'detail': [{'cible': c, 'op': o, 'ms': ms, 'lignes': l, 'octets': b} for c, o, ms, l, b in self.requetes]}
+
+    def jsonl(self):
+        return json.dumps(self.resume(), ensure_ascii=False)
+
+
+def courante():
+    return getattr(_local, 'mesure', None)
+
+
+def activer(mesure):
+    _local.mesure = mesure
+
+
+def propager(fn):
+    # Pour un autre thread (pages parallèles) : ses requêtes comptent dans la mesure du thread appelant
+    m = courante()
+
+    def tache(*a, **k):
+        activer(m)
+        try: return fn(*a, **k)
+        finally: activer(None)
+    return tache
+
+
+@contextmanager
+def section(nom):
+    m = courante()
+    if m is None:
+        yield; return
+    t = time.perf_counter()
+    try: yield
+    finally:
+        m.sections.append((nom, round((time.perf_counter() - t) * 1000, 1))); m._noter()
+
+
+class _Chaine:
+    # Enveloppe un constructeur de requête postgrest ; mesure l'appel final à execute()
+    def __init__(self, obj, cible, op=None, envoi=0):
+        self._obj, self._cible, self._op, self._envoi = obj, cible, op, envoi
+
+    def __getattr__(self, name):
+        attr = getattr(self._obj, name)
+        if name == 'execute': return self._execute
+        if not callable(attr): return _Chaine(attr, self._cible, self._op, self._envoi)  # ex. .not_
+
+        def appel(*a, **k):
+            op = name if name in OPERATIONS and self._op is None else self._op
+            envoi = self._envoi + (_taille(a[0]) if name in ECRITURES and a and courante() else 0)
+            return _Chaine(attr(*a, **k), self._cible, op, envoi)
+        return appel
+
+    def _execute(self):
+        m = courante()
+        if m is None: return self._obj.execute()
+        t = time.perf_counter()
+        res = self._obj.execute()
+        data = res.data
+        m.requete(self._cible, self._op or 'select', (time.perf_counter() - t) * 1000,
+                  len(data) if isinstance(data, list) else int(data is not None), self._envoi + _taille(data))
+        return res
+
+
+class ClientInstrumente:
+    """Client Supabase qui enregistre chaque execute() dans la mesure active du thread."""
+
+    def __init__(self, client):
+        self._client = client
+
+    def table(self, name):
+        return _Chaine(self._client.table(name), name)
+
+    def rpc(self, name, params=None):
+        return _Chaine(self._client.rpc(name, params or {}), f"rpc:{name}", 'rpc', _taille(params) if courante() else 0)
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
@@ -0,0 +1,53 @@
+# =========================================================
+# 📦 ÉCRITURES PAR LOTS
+# =========================================================
+import json
+import time
+
+CHUNK = 500          # lignes par requête d'écriture
+TENTATIVES = 3
+
+
+# Erreurs Postgres définitives les plus courantes : message lisible plutôt que le texte brut
+CONTRAINTES = {'23503': "ligne encore référencée ailleurs (ex. client ayant des factures)",
+               '23505': "valeur déjà existante (doublon)", '23502': "champ obligatoire vide", '23514': "valeur refusée par une contrainte"}
+
+
+class EcritureIncomplete(Exception):
+    def __init__(self, etape, faits, total, cause):
+        code = str(getattr(cause, 'code', '') or '')
+        raison = CONTRAINTES.get(code) or getattr(cause, 'message', None) or cause
+        super().__init__(f"{etape} : {faits}/{total} lignes écrites ({raison})")
+        self.etape, self.faits, self.total, self.code = etape, faits, total, code
+
+
+def transitoire(e):
+    """Coupure réseau, délai dépassé, 5xx, conflit de sérialisation : une nouvelle tentative peut passer.
+
+    Contrainte violée, donnée ou requête invalide (4xx, codes PGRST, SQLSTATE 22/23/42...) : inutile d'insister.
+    """
+    code = str(getattr(e, 'code', '') or '')
+    if not code: return not isinstance(e, (TypeError, ValueError, KeyError))
+    if code.isdigit() and len(code) == 3: return code.startswith('5')   # statut HTTP
+    if code.startswith('PGRST'): return False
+    return code[:2] in ('08', '40', '53', '57', '58')
+
+
+def records(df):
+    # to_json gère NaN -> null et les types numpy que le client JSON refuse
+    return json.loads(df.to_json(orient='records', date_format='iso'))
+
+
+def ecrire_par_lots(requete, rows, etape, chunk=CHUNK, tentatives=TENTATIVES, pause=1.0):
+    """Envoie `rows` par lots via `requete(lot)` ; un lot est retenté sur erreur transitoire, abandonné aussitôt sinon."""
+    out = []
+    for i in range(0, len(rows), chunk):
+        lot = rows[i:i + chunk]
+        for t in range(tentatives):
+            try:
+                out += requete(lot).execute().data or []
+                break
+            except Exception as e:
+                if t == tentatives - 1 or not transitoire(e): raise EcritureIncomplete(etape, i, len(rows), e) from e
+                time.sleep(pause * 2 ** t)
+    return out
@@ -0,0 +1,74 @@
+# =========================================================
+# 📑 PAGINATION PAR CLÉ (created_at, id)
+# =========================================================
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, time, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="prefetch")
+TZ = ZoneInfo('Europe/Paris')   # même découpage des jours que ca_journalier
+
+
+def debut_jour(d):
+    # Minuit heure de Paris, en UTC : une date nue serait lue comme minuit UTC par Postgres
+    return datetime.combine(d, time(), TZ).astimezone(timezone.utc).isoformat()
+
+
+def filtres_periode(debut=None, fin=None):
+    """Filtres created_at pour des dates incluses [debut, fin], jours de Paris."""
+    f = []
+    if debut: f.append(('gte', 'created_at', debut_jour(debut)))
+    if fin: f.append(('lt', 'created_at', debut_jour(fin + timedelta(days=1))))
+    return f
+
+
+class PageurKeyset:
+    """Pages de `taille` lignes triées par (created_at, id) décroissants, filtrées côté serveur.
+
+    Chaque page repart du dernier couple (created_at, id) vu : pas d'OFFSET, coût constant quelle que soit la profondeur.
+    La page demandée est relue à chaque appel (nouvelles ventes, nouveaux mouvements) ; seule la suivante est préchargée
+    en tâche de fond, et servie telle quelle une seule fois.
+    `filtres` : tuples (méthode, colonne, valeur) du client postgrest, ex. ('eq', 'client_id', 3).
+    """
+
+    def __init__(self, client, table, select="*", filtres=(), taille=100):
+        self.client, self.table, self.select, self.filtres, self.taille = client, table, select, tuple(filtres), taille
+        self.curseurs = [None]  # curseur de départ de chaque page déjà atteinte
+        self.pages = {}         # curseur -> Future de la page préchargée, pas encore servie
+
+    def _requete(self, curseur):
+        q = self.client.table(self.table).select(self.select).not_.is_('created_at', 'null')
+        for op, col, val in self.filtres: q = getattr(q, op)(col, val)
+        if curseur:
+            ts, i = curseur
+            q = q.or_(f'created_at.lt."{ts}",and(created_at.eq."{ts}",id.lt.{i})')
+        return q.order('created_at', desc=True).order('id', desc=True).limit(self.taille).execute().data
+
+    def borner(self, n):
+        """Numéro de page effectivement servi par page(n)."""
+        return max(0, min(n, len(self.curseurs) - 1))
+
+    def page(self, n):
+        n = self.borner(n); c = self.curseurs[n]
+        f = self.pages.pop(c, None) or _executor.submit(self._requete, c)
+        rows = f.result()
+        # Les curseurs au-delà dépendent de cette page relue : on les recalcule en avançant
+        suivant = (rows[-1]['created_at'], rows[-1]['id']) if len(rows) == self.taille else None
+        if self.curseurs[n + 1:n + 2] != [suivant]: del self.curseurs[n + 1:]
+        if suivant:
+            if len(self.curseurs) == n + 1: self.curseurs.append(suivant)
+            self.pages = {suivant: self.pages.get(suivant) or _executor.submit(self._requete, suivant)}
+        else: self.pages = {}
+        return rows
+
+    def a_suivante(self, n):
+        return len(self.curseurs) > n + 1
+
+    def tout(self):
+        # Parcours complet page par page (exports) ; la suivante est déjà en route pendant qu'on traite la courante
+        n = 0
+        while True:
+            rows = self.page(n)
+            yield from rows
+            if not self.a_suivante(n): return
+            n += 1
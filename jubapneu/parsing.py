@@ -0,0 +1,100 @@
+# =========================================================
+# 🔎 ANALYSE PDF FOURNISSEUR (DELDO)
+# =========================================================
+import hashlib
+import io
+import os
+import re
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+from .workers import get_pool, reset_pool
+
+LIGNE_RE = re.compile(r"^(\d+)\s+(.+)\s+(\d+\.\d{2})\s+(\d+\.\d{2})$")
+DIM_RE = re.compile(r"(\d{3})\s+(\d{2})\s+[A-Z]+\s+(\d{2})\s+(\d{2,3})\s+([A-Z])\s")
+
+PAGES_PAR_LOT = 8    # pages traitées par tâche (une ouverture du PDF par tâche)
+CACHE_MAX = 8        # fichiers gardés en mémoire
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def analyser_ligne_deldo(description):
+    infos = {"valid": False, "dimension_complete": description, "largeur": None, "hauteur": None, "diametre": None, "charge": "", "vitesse": "", "saison": "Été", "marque": "Inconnue"}
+    match = DIM_RE.search(description)
+    if not match: return infos
+    infos["valid"]=True; infos["largeur"]=int(match.group(1)); infos["hauteur"]=int(match.group(2)); infos["diametre"]=int(match.group(3))
+    infos["charge"]=match.group(4); infos["vitesse"]=match.group(5)
+    infos["dimension_complete"] = f"{infos['largeur']}/{infos['hauteur']} R{infos['diametre']} {infos['charge']}{infos['vitesse']}"
+    desc_up = description.upper()
+    if "AS" in desc_up or "4S" in desc_up or "ALL" in desc_up: infos["saison"]="4 Saisons"
+    elif "WINTER" in desc_up or "HIVER" in desc_up: infos["saison"]="Hiver"
+    mots = description.split()
+    if mots: infos["marque"] = mots[0]
+    return infos
+
+
+def analyser_texte(txt):
+    found = []
+    for l in txt.split('\n'):
+        m = LIGNE_RE.search(l.strip())
+        if m:
+            inf = analyser_ligne_deldo(m.group(2))
+            if inf["valid"]: found.append({"Desc": inf['dimension_complete'], "Marque": inf['marque'], "Qté": int(m.group(1)), "Prix": float(m.group(3)), "_inf": inf})
+    return found
+
+
+def _parser_pages(source, debut, fin):
+    # Exécuté dans un processus du pool : source = chemin du fichier temporaire
+    import pdfplumber
+    with pdfplumber.open(source) as pdf:
+        return debut, [row for p in pdf.pages[debut:fin] for row in analyser_texte(p.extract_text() or "")]
+
+
+def parser_pdf(data):
+    """Analyse un PDF fournisseur (bytes) et génère (pages_lues, total_pages, lignes) au fil de l'eau.
+
+    `lignes` est cumulatif et dans l'ordre des pages : le dernier élément généré est le résultat complet.
+    Le résultat est mis en cache par empreinte SHA-256 du contenu.
+    """
+    cle = hashlib.sha256(data).hexdigest()
+    with _cache_lock:
+        hit = _cache.get(cle)
+        if hit: _cache.move_to_end(cle)
+    if hit:
+        yield hit[0], hit[0], hit[1]; return
+    import pdfplumber
+    with pdfplumber.open(io.BytesIO(data)) as pdf:
+        n = len(pdf.pages)
+        # Petit fichier : le pool coûte plus qu'il ne rapporte
+        if n <= PAGES_PAR_LOT:
+            rows = [row for p in pdf.pages for row in analyser_texte(p.extract_text() or "")]
+            _mettre_en_cache(cle, n, rows)
+            yield n, n, rows; return
+
+    with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as tmp: tmp.write(data)
+    futs = []
+    try:
+        pool = get_pool()
+        futs = [pool.submit(_parser_pages, tmp.name, d, min(d + PAGES_PAR_LOT, n)) for d in range(0, n, PAGES_PAR_LOT)]
+        res = {}; lus = 0
+        for fut in as_completed(futs):
+            debut, rows = fut.result(); res[debut] = rows; lus += min(PAGES_PAR_LOT, n - debut)
+            yield lus, n, [r for d in sorted(res) for r in res[d]]
+        _mettre_en_cache(cle, n, [r for d in sorted(res) for r in res[d]])
+    except BrokenProcessPool:
+        reset_pool(); raise
+    finally:
+        # Rerun Streamlit en cours d'analyse : on abandonne les lots pas encore lancés
+        for fut in futs: fut.cancel()
+        os.unlink(tmp.name)
+
+
+def _mettre_en_cache(cle, n, rows):
+    with _cache_lock:
+        _cache[cle] = (n, rows)
+        while len(_cache) > CACHE_MAX: _cache.popitem(last=False)
@@ -0,0 +1,212 @@
+# =========================================================
+# 📄 GÉNÉRATEUR PDF FACTURES (PRO)
+# =========================================================
+import functools
+import io
+import os
+import zipfile
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from textwrap import wrap
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfgen import canvas
+from reportlab.platypus import Table, TableStyle
+
+from .workers import get_pool, reset_pool
+
+CHEMIN_LOGO = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "logo.png")
+WIDTH, HEIGHT = A4
+BAS_TABLEAU = 60          # au-dessus du pied de page légal
+HAUT_SUITE = HEIGHT - 140  # début du tableau sur les pages de suite
+HAUTEUR_TOTAUX = 80
+
+STYLE_TABLEAU = TableStyle([
+    ('BACKGROUND', (0,0), (-1,0), colors.HexColor("#f2f2f2")),
+    ('TEXTCOLOR', (0,0), (-1,0), colors.black),
+    ('ALIGN', (0,0), (-1,-1), 'CENTER'),
+    ('ALIGN', (0,1), (0,-1), 'LEFT'),
+    ('ALIGN', (3,1), (-1,-1), 'RIGHT'),
+    ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
+    ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold'),
+    ('BOTTOMPADDING', (0,0), (-1,0), 8),
+    ('GRID', (0,0), (-1,-1), 0.5, colors.grey)
+])
+
+
+@functools.lru_cache(maxsize=1)
+def _logo():
+    # Lu une seule fois par processus
+    if not os.path.exists(CHEMIN_LOGO): return None
+    try: return ImageReader(CHEMIN_LOGO)
+    except Exception: return None
+
+
+def _fond(c):
+    """Parties fixes (logo, coordonnées, mentions légales) dessinées une fois par document en XObject, puis réutilisées."""
+    if not c.hasForm('fond'):
+        c.beginForm('fond')
+        logo = _logo()
+        if logo:
+            c.drawImage(logo, 50, HEIGHT - 110, width=140, height=60, preserveAspectRatio=True, mask='auto')
+        else:
+            c.setFont("Helvetica-Bold", 20)
+            c.drawString(50, HEIGHT - 50, "JUBAPNEU")
+        c.setFont("Helvetica", 10)
+        y_info = HEIGHT - 120
+        c.drawString(50, y_info, "10 Place Jeanne d'Arc - 54310 Homécourt")
+        c.drawString(50, y_info - 15, "Tel: 09 54 45 98 22")
+        c.drawString(50, y_info - 30, "Email: contact@jubapneu.eu | Web: jubapneu.eu")
+        c.setFont("Helvetica", 8)
+        c.setFillColor(colors.dimgrey)
+        c.drawCentredString(WIDTH / 2, 40, "SARL - Société à Responsabilité Limitée JubaPneu au capital social de 10 000€")
+        c.drawCentredString(WIDTH / 2, 30, "Siège social: 10 Place Jeanne d'Arc-54310 Homécourt")
+        c.drawCentredString(WIDTH / 2, 20, "Siret: 92063340100012 | Numéro TVA Intracommunautaire: FR09920633401")
+        c.endForm()
+    c.doForm('fond')
+
+
+def _date_str(date_obj):
+    if not date_obj: return datetime.now().strftime('%d/%m/%Y')
+    if isinstance(date_obj, str): return date_obj
+    return date_obj.strftime('%d/%m/%Y')
+
+
+def _lignes_tableau(lignes):
+    data = [["Désignation", "Qté", "TVA", "Montant HT", "Montant TTC"]]
+    total_ht = 0
+    total_tva = 0
+    for l in lignes:
+        desc = l.get('desc') or (f"Pneu {l['articles']['marque']} {l['articles']['dimension_complete']}" if l.get('articles') else "Service")
+        qte = l.get('qte') or l.get('quantite')
+        prix_ttc_unit = l.get('prix') or l.get('prix_vente_unitaire')
+
+        prix_ttc_total = qte * prix_ttc_unit
+        prix_ht_total = prix_ttc_total / 1.20
+        tva_total = prix_ttc_total - prix_ht_total
+
+        total_ht += prix_ht_total
+        total_tva += tva_total
+
+        data.append(["\n".join(wrap(desc, 45)), str(qte), "20%", f"{prix_ht_total:.2f} €", f"{prix_ttc_total:.2f} €"])
+    return data, total_ht, total_tva
+
+
+def _page_suite(c, numero_facture, date_str):
+    c.showPage()
+    _fond(c)
+    c.setFillColor(colors.black)
+    c.setFont("Helvetica-Bold", 12)
+    c.drawRightString(WIDTH - 50, HEIGHT - 50, f"FACTURE N° {numero_facture} (suite)")
+    c.setFont("Helvetica", 10)
+    c.drawRightString(WIDTH - 50, HEIGHT - 70, f"Le {date_str}")
+
+
+def dessiner_facture(c, client_dict, lignes, total_ttc, numero_facture, date_obj=None):
+    """Dessine une facture sur le canvas `c` (une ou plusieurs pages) ; ne ferme pas la dernière page."""
+    client_dict = client_dict if isinstance(client_dict, dict) else {}
+    date_str = _date_str(date_obj)
+
+    # --- 1. FOND (Logo, Entreprise, Pied de page légal) ---
+    _fond(c)
+    c.setFillColor(colors.black)
+
+    # --- 2. EN-TÊTE DROITE (Numéro Facture) ---
+    c.setFont("Helvetica-Bold", 16)
+    c.drawRightString(WIDTH - 50, HEIGHT - 50, "FACTURE")
+    c.setFont("Helvetica", 12)
+    c.drawRightString(WIDTH - 50, HEIGHT - 70, f"N° {numero_facture}")
+    c.setFont("Helvetica", 10)
+    c.drawRightString(WIDTH - 50, HEIGHT - 90, f"Le {date_str}")
+
+    # --- 3. BLOC CLIENT ---
+    c.roundRect(WIDTH - 250, HEIGHT - 200, 200, 75, 5)
+    c.setFont("Helvetica-Bold", 11)
+    c.drawString(WIDTH - 240, HEIGHT - 145, f"Client : {client_dict.get('nom', 'Inconnu')}")
+    c.setFont("Helvetica", 10)
+    if client_dict.get('adresse'):
+        c.drawString(WIDTH - 240, HEIGHT - 160, f"{client_dict['adresse']}")
+        c.drawString(WIDTH - 240, HEIGHT - 175, f"{client_dict.get('code_postal', '')} {client_dict.get('ville', '')}")
+
+    # --- 4. TABLEAU DES LIGNES (paginé, en-tête répété) ---
+    data, total_ht, total_tva = _lignes_tableau(lignes)
+    reste = Table(data, colWidths=[230, 40, 40, 80, 80], repeatRows=1)
+    reste.setStyle(STYLE_TABLEAU)
+    y_haut = HEIGHT - 240
+    while True:
+        dispo = y_haut - BAS_TABLEAU
+        w, h = reste.wrap(WIDTH, dispo)
+        morceaux = reste.split(WIDTH, dispo) if h > dispo else []
+        if len(morceaux) < 2:
+            reste.drawOn(c, 50, y_haut - h); y_pos = y_haut - h
+            break
+        w, h = morceaux[0].wrap(WIDTH, dispo)
+        morceaux[0].drawOn(c, 50, y_haut - h)
+        _page_suite(c, numero_facture, date_str); y_haut = HAUT_SUITE
+        reste = morceaux[1]
+
+    # --- 5. TOTAUX ---
+    if y_pos - HAUTEUR_TOTAUX < BAS_TABLEAU:
+        _page_suite(c, numero_facture, date_str); y_pos = HAUT_SUITE
+    y_tot = y_pos - 30
+    c.setFont("Helvetica-Bold", 10)
+    c.drawRightString(WIDTH - 140, y_tot, "Total HT :")
+    c.drawRightString(WIDTH - 50, y_tot, f"{total_ht:.2f} €")
+
+    y_tot -= 15
+    c.setFont("Helvetica", 10)
+    c.drawRightString(WIDTH - 140, y_tot, "TVA (20%) :")
+    c.drawRightString(WIDTH - 50, y_tot, f"{total_tva:.2f} €")
+
+    y_tot -= 20
+    c.setFont("Helvetica-Bold", 12)
+    c.drawRightString(WIDTH - 140, y_tot, "Total TTC :")
+    c.drawRightString(WIDTH - 50, y_tot, f"{total_ttc:.2f} €")
+
+    # --- 6. CONDITIONS DE PAIEMENT ---
+    c.setFont("Helvetica", 9)
+    c.drawString(50, y_tot, "Conditions de paiement :")
+    c.drawString(50, y_tot - 15, f"• 100,00% soit {total_ttc:.2f} € à payer comptant.")
+
+
+def generer_pdf(facture_id, client_dict, lignes, total_ttc, numero_facture, date_obj=None):
+    buffer = io.BytesIO()
+    c = canvas.Canvas(buffer, pagesize=A4)
+    dessiner_facture(c, client_dict, lignes, total_ttc, numero_facture, date_obj)
+    c.showPage()
+    c.save()
+    buffer.seek(0)
+    return buffer
+
+
+def _rendre(f):
+    # Exécuté dans un processus du pool
+    return f['id'], f['numero_facture'], generer_pdf(f['id'], f['client'], f['lignes'], f['total_ttc'], f['numero_facture'], f.get('date')).getvalue()
+
+
+def generer_lot(factures, fusion=False, progress=None):
+    """Exporte `factures` (dicts id/client/lignes/total_ttc/numero_facture/date).
+
+    fusion=True : un seul PDF (fond partagé entre toutes les pages) ; sinon un ZIP d'un PDF par facture, rendus en parallèle.
+    """
+    progress = progress or (lambda x: None)
+    buffer = io.BytesIO()
+    if fusion:
+        c = canvas.Canvas(buffer, pagesize=A4)
+        for i, f in enumerate(factures):
+            dessiner_facture(c, f['client'], f['lignes'], f['total_ttc'], f['numero_facture'], f.get('date'))
+            c.showPage(); progress((i + 1) / len(factures))
+        c.save()
+    else:
+        noms = set()
+        with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as z:
+            try:
+                for i, (fid, num, pdf) in enumerate(get_pool().map(_rendre, factures, chunksize=8)):
+                    # Les numéros sont à la minute : deux factures peuvent partager le même
+                    nom = f"Facture_{num}.pdf" if num not in noms else f"Facture_{num}_{fid}.pdf"; noms.add(num)
+                    z.writestr(nom, pdf); progress((i + 1) / len(factures))
+            except BrokenProcessPool: reset_pool(); raise
+    buffer.seek(0)
+    return buffer
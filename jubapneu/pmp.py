@@ -0,0 +1,14 @@
+# =========================================================
+# 💶 PMP (PRIX MOYEN PONDÉRÉ D'ACHAT)
+# =========================================================
+import numpy as np
+
+
+def pmp_apres_achat(stock, pmp, qte, prix):
+    """PMP après l'entrée de `qte` unités à `prix` sur un stock `stock` valorisé à `pmp`.
+
+    Scalaires ou tableaux (vectorisé). Stock résultant nul ou négatif : le prix d'achat devient le PMP.
+    """
+    stock, pmp, qte, prix = (np.asarray(x, dtype=float) for x in (stock, pmp, qte, prix))
+    ns = stock + qte
+    return np.where(ns > 0, (stock * np.nan_to_num(pmp) + qte * prix) / np.where(ns > 0, ns, 1), prix)
@@ -0,0 +1,113 @@
+# =========================================================
+# 🔍 INDEX DE RECHERCHE PAR DIMENSION
+# =========================================================
+import bisect
+import difflib
+import re
+import threading
+
+import pandas as pd
+
+TOKEN_RE = re.compile(r"\d+|[^\W\d_]+")
+DIM_RE = re.compile(r"(\d{3})\D*(\d{2})\D*(\d{2})")
+SEPARATEURS = {"R", "ZR", "Z"}   # 205/55R16, 225/45ZR17
+LONGUEUR_CLE = 7                  # 205 55 16 -> "2055516"
+
+
+def _cle(row):
+    try: return f"{int(row['largeur']):03d}{int(row['hauteur']):02d}{int(row['diametre']):02d}"
+    except (TypeError, ValueError, KeyError):
+        m = DIM_RE.search(str(row.get('dimension_complete') or ""))
+        return "".join(m.groups()) if m else ""
+
+
+def analyser_requete(q):
+    """'205/55R16 91V' -> ('2055516', '91V', []), '91V' -> ('', '91V', []) ; les mots restants (marque, saison) sont renvoyés à part."""
+    cle, cv, mots = "", "", []
+    toks = list(TOKEN_RE.finditer(q.upper()))
+    for k, m in enumerate(toks):
+        t = m.group()
+        # '91V' seul : moins de 3 chiffres collés à une lettre = charge/vitesse, pas un début de dimension
+        suiv = toks[k + 1] if k + 1 < len(toks) else None
+        if not cle and not cv and t.isdigit() and len(t) < 3 and suiv and suiv.start() == m.end() and len(suiv.group()) == 1 and suiv.group().isalpha():
+            cv = t; continue
+        if t.isdigit():
+            if len(cle) < LONGUEUR_CLE:
+                n = LONGUEUR_CLE - len(cle); cle += t[:n]; t = t[n:]
+            if t and not cv: cv = t
+        elif t in SEPARATEURS and len(cle) < LONGUEUR_CLE: continue
+        elif len(t) == 1 and cv and not cv[-1].isalpha(): cv += t
+        elif len(t) > 1: mots.append(t)
+    return cle, cv, mots
+
+
+class IndexPneus:
+    """Index en mémoire des articles : préfixe de dimension, charge/vitesse, marque et saison.
+
+    Alimenté par DataStore.subscribe('articles', index.charger) : seules les lignes modifiées sont réindexées.
+    """
+
+    def __init__(self):
+        self.entrees = {}   # id -> (cle, cv, marque, saison, stock)
+        self.cles = []      # [(cle, id)] trié, pour la recherche par préfixe
+        self.marques = set()
+        self.lock = threading.Lock()
+
+    def charger(self, df, full):
+        with self.lock:
+            if full: self.entrees, self.cles = {}, []
+            for row in df.to_dict('records'):
+                i = int(row['id'])
+                if i in self.entrees and not full: self._retirer(i)
+                e = (_cle(row), f"{row.get('charge') or ''}{row.get('vitesse') or ''}".upper(), str(row.get('marque') or "").upper(),
+                     row.get('saison'), 0 if pd.isna(row.get('stock_actuel')) else int(row['stock_actuel']))
+                self.entrees[i] = e
+                if full: self.cles.append((e[0], i))
+                else: bisect.insort(self.cles, (e[0], i))
+            if full: self.cles.sort()
+            self.marques = {e[2] for e in self.entrees.values()}
+
+    def _retirer(self, i):
+        k = (self.entrees.pop(i)[0], i)
+        j = bisect.bisect_left(self.cles, k)
+        if j < len(self.cles) and self.cles[j] == k: del self.cles[j]
+
+    def _par_prefixe(self, p):
+        j = bisect.bisect_left(self.cles, (p,))
+        out = []
+        while j < len(self.cles) and self.cles[j][0].startswith(p): out.append(self.cles[j][1]); j += 1
+        return out
+
+    def _approchant(self, cle):
+        # Faute de frappe sur une dimension complète : un chiffre de différence sur largeur/hauteur, jamais sur la jante
+        return [i for k, i in self.cles if len(k) == len(cle) and k[-2:] == cle[-2:] and sum(a != b for a, b in zip(k, cle)) == 1]
+
+    def approchant(self, q):
+        """Vrai si `chercher(q)` se rabat sur les dimensions approchantes (aucune dimension exacte)."""
+        cle = analyser_requete(q or "")[0]
+        with self.lock: return len(cle) == LONGUEUR_CLE and not self._par_prefixe(cle)
+
+    def _marques_pour(self, mot):
+        m = {x for x in self.marques if x.startswith(mot)}
+        return m or set(difflib.get_close_matches(mot, self.marques, n=3, cutoff=0.75))
+
+    def chercher(self, q="", saisons=None, marques=None, en_stock=True, limite=None):
+        """Ids des articles correspondant à `q`, triés par dimension."""
+        cle, cv, mots = analyser_requete(q or "")
+        with self.lock:
+            ids = self._par_prefixe(cle) if cle else [i for _, i in self.cles]
+            if not ids and len(cle) == LONGUEUR_CLE: ids = self._approchant(cle)
+            filtres_marque = [self._marques_pour(m) for m in mots]
+            saisons = set(saisons or ()); marques = {m.upper() for m in marques or ()}
+            out = []
+            for i in ids:
+                k, c, mq, sa, st = self.entrees[i]
+                if en_stock and st <= 0: continue
+                if cv and not c.startswith(cv): continue
+                if saisons and sa not in saisons: continue
+                if marques and mq not in marques: continue
+                # Un mot libre qui n'est pas une marque peut viser la saison (HIVER, ÉTÉ...)
+                if any(mq not in fm and mot not in str(sa).upper() for mot, fm in zip(mots, filtres_marque)): continue
+                out.append(i)
+                if limite and len(out) >= limite: break
+            return out
@@ -0,0 +1,255 @@
+# =========================================================
+# 🛰️ RÉPLIQUE LOCALE SQLITE + FILE D'ENVOI DES VENTES
+# =========================================================
+# Même interface que DataStore (get / subscribe / invalidate) : les tables de MIROIR sont lues dans un fichier
+# SQLite local, tenu à jour par un thread d'arrière-plan ; les autres tables passent par le DataStore fourni.
+# Les factures des JOURS_FACTURES derniers jours (entêtes + lignes) et les ventes en file servent "Mes Factures".
+# Les ventes sont écrites dans une file locale (outbox) puis envoyées par lots via creer_factures_lot
+# (sql/007_file_envoi.sql) ; la clé d'idempotence de chaque vente rend les renvois sans effet.
+# Prérequis : sql/001_updated_at.sql (synchro par delta) et sql/007_file_envoi.sql.
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+
+from .chargement import lire_lignes
+from .factures import payload_facture
+from .store import DEPENDANCES, TABLES, colonnes
+
+MIROIR = ('articles', 'clients', 'services', 'factures_entete', 'factures_lignes')   # lignes après entêtes (cf. _tirer)
+JOURS_FACTURES = 90   # factures récentes seulement ; l'historique complet reste paginé côté serveur
+LOT = 20              # ventes par appel creer_factures_lot
+TZ = 'Europe/Paris'
+
+SCHEMA = """
+create table if not exists lignes (tbl text not null, id integer not null, data text not null, primary key (tbl, id));
+create table if not exists curseurs (tbl text primary key, watermark text);
+create table if not exists outbox (cle text primary key, params text not null, cree_le text not null,
+                                   etat text not null default 'attente', tentatives integer not null default 0,
+                                   erreur text, resultat text);
+"""
+
+
+class Replica:
+    """Réplique SQLite de MIROIR, synchronisée toutes les `periode` secondes, et file d'envoi des ventes."""
+
+    def __init__(self, client, chemin, store, periode=10):
+        self.client, self.store, self.periode = client, store, periode
+        self.db = sqlite3.connect(chemin, check_same_thread=False)
+        self.db.execute("pragma journal_mode=wal"); self.db.executescript(SCHEMA)
+        self.lock = threading.RLock()
+        self.frames = {n: self._lire(n) for n in MIROIR}
+        self.listeners = {n: [] for n in MIROIR}
+        self.attente = Counter()   # article_id -> quantité vendue pas encore envoyée
+        self.envois = []           # fn(jour) : jour (Paris) de la plus ancienne vente d'un lot envoyé
+        self.synchro_le = None; self.erreur = None
+        self.reveil = threading.Event(); self.thread = None
+        self._recalculer_attente()
+
+    # --- lecture locale ---
+    def _lire(self, nom):
+        rows = [json.loads(d) for (d,) in self.db.execute("select data from lignes where tbl = ?", (nom,))]
+        return self._trier(nom, pd.DataFrame(rows))
+
+    def _trier(self, nom, df):
+        spec = TABLES[nom]
+        if spec.order and not df.empty: df = df.sort_values(spec.order, ascending=not spec.desc, kind='stable')
+        return df.reset_index(drop=True)
+
+    def _vue(self, nom, df):
+        # Stock vu au comptoir = stock serveur - ventes encore dans la file
+        if nom != 'articles' or df.empty or not self.attente: return df.copy()
+        df = df.copy()
+        df['stock_actuel'] = df['stock_actuel'] - df['id'].map(self.attente).fillna(0).astype(int)
+        return df
+
+    def get(self, nom):
+        if nom not in MIROIR: return self.store.get(nom)
+        with self.lock:
+            # Premier lancement : rien en local, on attend la première synchro
+            if self.frames[nom].empty and self._watermark(nom) is None:
+                try: self._tirer(nom)
+                except Exception as e: self.erreur = e
+            return self._vue(nom, self.frames[nom])
+
+    def get_many(self, *names):
+        return tuple(self.get(n) for n in names)
+
+    def subscribe(self, nom, fn):
+        if nom not in MIROIR: return self.store.subscribe(nom, fn)
+        with self.lock:
+            self.listeners[nom].append(fn)
+            if not self.frames[nom].empty: fn(self._vue(nom, self.frames[nom]), True)
+
+    def invalidate(self, *names, full=False):
+        # Écriture directe côté serveur (éditeurs, import) : relecture immédiate, sinon au prochain cycle
+        for n in names:
+            if n not in MIROIR: self.store.invalidate(n, full=full); continue
+            for t in (n, *DEPENDANCES.get(n, ())):
+                try: self._tirer(t, full=full or t != n)
+                except Exception as e: self.erreur = e; self.reveil.set()
+
+    # --- synchro serveur -> local ---
+    def _watermark(self, nom):
+        with self.lock: r = self.db.execute("select watermark from curseurs where tbl = ?", (nom,)).fetchone()
+        return r[0] if r else None
+
+    def _tirer(self, nom, full=False):
+        spec = TABLES[nom]
+        wm = None if full else self._watermark(nom)
+        if wm is not None: filtres = [('gt', 'id', int(wm)) if spec.delta == 'id' else ('gte', spec.delta, wm)]
+        elif nom == 'factures_entete': filtres = [('gte', 'created_at', (datetime.now(timezone.utc) - timedelta(days=JOURS_FACTURES)).isoformat())]
+        elif nom == 'factures_lignes':
+            # Lignes des seules factures répliquées ; rien tant qu'aucune entête n'est arrivée
+            ids = self.frames['factures_entete'].get('id')
+            if ids is None or ids.empty: return
+            filtres = [('gte', 'facture_id', int(ids.min()))]
+        else: filtres = []
+        rows = lire_lignes(self.client, nom, colonnes(spec, spec.delta), filtres, ((spec.delta, False),))
+        if rows or full: self._ecrire(nom, spec, rows, full)
+        # Articles relus : le stock serveur inclut les ventes déjà envoyées, on ne les retranche plus
+        if nom == 'articles': self._recalculer_attente()
+
+    def _ecrire(self, nom, spec, rows, full):
+        new = pd.DataFrame(rows)
+        with self.lock, self.db:
+            if full: self.db.execute("delete from lignes where tbl = ?", (nom,))
+            self.db.executemany("insert or replace into lignes (tbl, id, data) values (?, ?, ?)", [(nom, r['id'], json.dumps(r)) for r in rows])
+            if rows:
+                m = new[spec.delta].max()
+                self.db.execute("insert or replace into curseurs (tbl, watermark) values (?, ?)", (nom, str(int(m) if spec.delta == 'id' else m)))
+            else: self.db.execute("delete from curseurs where tbl = ?", (nom,))
+            df = new if full else pd.concat([self.frames[nom], new], ignore_index=True).drop_duplicates('id', keep='last')
+            self.frames[nom] = self._trier(nom, df)
+            for fn in self.listeners[nom]: fn(self._vue(nom, self.frames[nom] if full else new), full)
+
+    # --- file d'envoi ---
+    def _recalculer_attente(self):
+        with self.lock:
+            att = Counter()
+            for (p,) in self.db.execute("select params from outbox where etat = 'attente'"):
+                for l in json.loads(p)['p_lignes']:
+                    if l['article_id'] is not None: att[l['article_id']] += l['quantite']
+            avant, self.attente = self.attente, att
+            ids = set(avant) | set(att)
+            if ids and self.listeners['articles'] and not self.frames['articles'].empty:
+                df = self.frames['articles']
+                for fn in self.listeners['articles']: fn(self._vue('articles', df[df['id'].isin(ids)]), False)
+
+    def vendre(self, cli, panier, total_ttc, numero):
+        """Met la vente en file (écriture locale, sans réseau) ; retourne sa clé d'idempotence."""
+        cle = uuid.uuid4().hex
+        p = payload_facture(cli, panier, total_ttc, numero)
+        p['p_facture']['created_at'] = datetime.now(timezone.utc).isoformat()
+        with self.lock, self.db:
+            self.db.execute("insert into outbox (cle, params, cree_le) values (?, ?, ?)", (cle, json.dumps(p), p['p_facture']['created_at']))
+        self._recalculer_attente(); self.reveil.set()
+        return cle
+
+    def vider(self):
+        """Envoie les ventes en attente par lots de LOT ; retourne le nombre de ventes traitées."""
+        n = 0
+        while True:
+            with self.lock, self.db:
+                lot = self.db.execute("select cle, params from outbox where etat = 'attente' order by cree_le, rowid limit ?", (LOT,)).fetchall()
+                if not lot: return n
+                self.db.execute(f"update outbox set tentatives = tentatives + 1 where cle in ({','.join('?' * len(lot))})", [c for c, _ in lot])
+            # Coupure ici : le lot reste en attente et sera renvoyé tel quel, la clé évite les doublons
+            res = self.client.rpc('creer_factures_lot', {'p_lot': [{'cle': c, **json.loads(p)} for c, p in lot]}).execute().data
+            with self.lock, self.db:
+                for r in res:
+                    if r.get('erreur'): self.db.execute("update outbox set etat = 'echec', erreur = ? where cle = ?", (r['erreur'], r['cle']))
+                    else: self.db.execute("update outbox set etat = 'envoye', resultat = ? where cle = ?", (json.dumps(r), r['cle']))
+            # Ventes datées de leur heure réelle : des jours déjà passés de ca_journalier ont pu bouger
+            ok = {r['cle'] for r in res if not r.get('erreur')}
+            dates = [json.loads(p)['p_facture']['created_at'] for c, p in lot if c in ok]
+            if dates:
+                jour = pd.Timestamp(min(dates)).tz_convert(TZ).tz_localize(None).normalize()
+                for fn in self.envois: fn(jour)
+            n += len(lot)
+
+    def abonner_envois(self, fn):
+        """`fn(jour)` après chaque lot envoyé, avec le jour (Paris, sans fuseau) de sa plus ancienne vente."""
+        with self.lock: self.envois.append(fn)
+
+    def relancer(self, cle=None):
+        """Remet en attente une vente en échec (toutes si `cle` est None)."""
+        with self.lock, self.db:
+            self.db.execute("update outbox set etat = 'attente', erreur = null where etat = 'echec' and (? is null or cle = ?)", (cle, cle))
+        self._recalculer_attente(); self.reveil.set()
+
+    def echecs(self):
+        with self.lock:
+            return pd.read_sql("select cle, cree_le, tentatives, erreur, params from outbox where etat = 'echec' order by cree_le", self.db)
+
+    # --- factures locales ---
+    def couvre(self, debut):
+        """Vrai si une période commençant à `debut` (None = sans borne -> factures récentes) est servie en local."""
+        return debut is None or pd.Timestamp(debut) >= pd.Timestamp.now().normalize() - pd.Timedelta(days=JOURS_FACTURES - 1)
+
+    def _client(self, p_client):
+        cli = self.frames['clients']
+        if p_client.get('id') and not cli.empty and (cli['id'] == p_client['id']).any():
+            return cli[cli['id'] == p_client['id']].iloc[0].to_dict()
+        return p_client
+
+    def factures(self, debut=None, fin=None, client_id=None):
+        """Factures répliquées et ventes encore en file (statut 'En attente'), les plus récentes d'abord."""
+        with self.lock:
+            f = self.frames['factures_entete'].copy()
+            file = self.db.execute("select cle, params from outbox where etat = 'attente'").fetchall()
+            att = []
+            for cle, p in file:
+                p = json.loads(p); cli = self._client(p['p_client'])
+                att.append({**p['p_facture'], 'id': None, 'cle': cle, 'statut': 'En attente', 'client_id': cli.get('id'), 'clients': cli})
+        df = pd.concat([f, pd.DataFrame(att)], ignore_index=True) if att else f
+        if df.empty: return df
+        df['created_at'] = pd.to_datetime(df['created_at'], utc=True, format='ISO8601').dt.tz_convert(TZ).dt.tz_localize(None)
+        jour = df['created_at'].dt.normalize()
+        if debut: df = df[jour >= pd.Timestamp(debut)]
+        if fin: df = df[jour <= pd.Timestamp(fin)]
+        if client_id is not None: df = df[df['client_id'] == client_id]
+        return df.sort_values('created_at', ascending=False, kind='stable').reset_index(drop=True)
+
+    def lignes(self, factures):
+        """Lignes (avec l'article) de `factures` (dicts issus de factures()) : {id, ou clé pour une vente en file : [lignes]}."""
+        with self.lock:
+            fl = self.frames['factures_lignes']; art = self.frames['articles']
+            par_facture = {k: g.to_dict('records') for k, g in fl.groupby('facture_id')} if not fl.empty else {}
+            arts = art.set_index('id')[['marque', 'dimension_complete']].to_dict('index') if not art.empty else {}
+            out = {}
+            for f in factures:
+                if pd.isna(f.get('id')):
+                    (p,) = self.db.execute("select params from outbox where cle = ?", (f['cle'],)).fetchone()
+                    out[f['cle']] = [{**l, 'articles': arts.get(l['article_id'])} for l in json.loads(p)['p_lignes']]
+                else: out[int(f['id'])] = par_facture.get(int(f['id']), [])
+        return out
+
+    # --- arrière-plan ---
+    def synchroniser(self):
+        if self.vider(): self.store.invalidate('mouvements_stock')
+        # articles en tête : leur relecture recalcule aussitôt les ventes en attente, même si la suite échoue
+        for n in MIROIR: self._tirer(n)
+        self.synchro_le = time.time(); self.erreur = None
+
+    def _boucle(self):
+        while True:
+            try: self.synchroniser()
+            except Exception as e: self.erreur = e
+            self.reveil.wait(self.periode); self.reveil.clear()
+
+    def demarrer(self):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._boucle, name="replica", daemon=True); self.thread.start()
+        return self
+
+    def etat(self):
+        with self.lock:
+            n = dict(self.db.execute("select etat, count(*) from outbox group by etat").fetchall())
+        return {'attente': n.get('attente', 0), 'echec': n.get('echec', 0), 'synchro_le': self.synchro_le,
+                'erreur': None if self.erreur is None else str(getattr(self.erreur, 'message', self.erreur))}
@@ -0,0 +1,71 @@
+# =========================================================
+# 📊 STATISTIQUES
+# =========================================================
+import threading
+import time
+from datetime import timedelta
+
+import pandas as pd
+
+from .chargement import lire_lignes
+from .pagination import debut_jour
+
+
+def top_ventes(client, debut=None, fin=None, saisons=None, marques=None, limite=10):
+    """Classement des dimensions les plus vendues, agrégé par la fonction SQL top_ventes (sql/003_top_ventes.sql).
+
+    `debut` / `fin` sont des dates incluses, jours de Paris comme ca_journalier.
+    """
+    params = {'p_debut': debut_jour(debut) if debut else None,
+              'p_fin': debut_jour(fin + timedelta(days=1)) if fin else None,
+              'p_saisons': list(saisons) if saisons else None,
+              'p_marques': list(marques) if marques else None,
+              'p_limite': int(limite)}
+    return pd.DataFrame(client.rpc('top_ventes', params).execute().data, columns=['dimension_complete', 'quantite', 'ca'])
+
+
+class RollupCA:
+    """Série journalière de CA / marge lue dans ca_journalier (sql/004_ca_journalier.sql), gardée en mémoire.
+
+    Seul le dernier jour connu peut encore bouger : les rafraîchissements ne relisent que lui et les suivants,
+    sauf jour plus ancien signalé par invalidate(depuis) (ventes de la file envoyées en retard).
+    """
+
+    def __init__(self, client, ttl=30):
+        self.client, self.ttl = client, ttl
+        self.df = pd.DataFrame(columns=['nb_factures', 'ca_ttc', 'cout_achat'], index=pd.DatetimeIndex([], name='jour'))
+        self.synced_at = None; self.relire = None
+        self.lock = threading.Lock()
+
+    def _lire(self, depuis):
+        return lire_lignes(self.client, 'ca_journalier', 'jour, nb_factures, ca_ttc, cout_achat',
+                           [('gte', 'jour', depuis.date().isoformat())] if depuis is not None else [], [('jour', False)], cle='jour')
+
+    def rafraichir(self, force=False):
+        with self.lock:
+            if not force and self.synced_at and time.monotonic() - self.synced_at < self.ttl: return
+            depuis = self.df.index.max() if not self.df.empty else None
+            if depuis is not None and self.relire is not None: depuis = min(depuis, self.relire)
+            self.relire = None
+            rows = self._lire(depuis)
+            if rows:
+                new = pd.DataFrame(rows)
+                new['jour'] = pd.to_datetime(new['jour'])
+                new = new.set_index('jour').astype(float)
+                self.df = pd.concat([self.df[self.df.index < new.index.min()].astype(float), new])
+            self.synced_at = time.monotonic()
+
+    def invalidate(self, depuis=None):
+        with self.lock:
+            self.synced_at = None
+            if depuis is not None: self.relire = min(self.relire, depuis) if self.relire is not None else depuis
+
+    def serie(self, freq='D', debut=None, fin=None):
+        """CA TTC / HT, coût d'achat et marge par jour ('D'), semaine ('W') ou mois ('M') sur [debut, fin]."""
+        with self.lock: d = self.df
+        if debut: d = d[d.index >= pd.Timestamp(debut)]
+        if fin: d = d[d.index <= pd.Timestamp(fin)]
+        # 'M' n'existe plus dans pandas récents : début de mois
+        r = d.resample({'M': 'MS'}.get(freq, freq)).sum()
+        r = r.assign(ca_ht=r['ca_ttc'] / 1.20)
+        return r.assign(marge=r['ca_ht'] - r['cout_achat']).reset_index()
@@ -0,0 +1,137 @@
+# =========================================================
+# 🗃️ CACHE DES TABLES (TTL + SYNCHRO INCRÉMENTALE)
+# =========================================================
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+import pandas as pd
+
+from .chargement import lire_table
+from .instrumentation import propager
+
+_executor = ThreadPoolExecutor(max_workers=5, thread_name_prefix="tables")  # un thread par table
+
+
+@dataclass(frozen=True)
+class TableSpec:
+    name: str
+    select: str = "*"
+    order: str | None = None
+    desc: bool = False
+    delta: str | None = "id"  # 'id' = table en ajout seul, 'updated_at' = lignes modifiables, None = rechargement complet
+
+
+# Colonnes projetées : seules celles lues par l'app (articles -> stock, recherche, valorisation ; mouvements -> rejeu).
+# La colonne de synchro n'y figure pas : colonnes() l'ajoute, et TableCache s'en passe si elle n'existe pas (sans sql/001).
+TABLES = {
+    'articles': TableSpec('articles', select='id, dimension_complete, largeur, hauteur, diametre, charge, vitesse, marque, saison, stock_actuel, pmp_achat',
+                          delta='updated_at'),
+    'mouvements_stock': TableSpec('mouvements_stock', select='id, article_id, type_mouvement, quantite, prix_achat_unitaire, created_at', delta='id'),
+    'clients': TableSpec('clients', order='nom', delta='updated_at'),
+    'factures_entete': TableSpec('factures_entete', select='*, clients(*)', order='created_at', desc=True, delta='id'),
+    'factures_lignes': TableSpec('factures_lignes', select='*, articles(marque, dimension_complete)', delta='id'),
+    'services': TableSpec('services', order='description', delta='updated_at'),
+}
+
+# factures_entete embarque clients(*) : une modif client doit la recharger
+DEPENDANCES = {'clients': ('factures_entete',)}
+
+
+def colonnes(spec, delta):
+    """Projection de `spec` complétée par la colonne de synchro `delta` (None = projection seule)."""
+    cols = [c.strip() for c in spec.select.split(',')]
+    if not delta or '*' in cols or delta in cols: return spec.select
+    return f"{spec.select}, {delta}"
+
+
+def colonne_absente(e, col):
+    # PostgREST / Postgres : colonne inexistante (SQLSTATE 42703, ou PGRST204/message citant la colonne)
+    return str(getattr(e, 'code', '')) in ('42703', 'PGRST204') or col in str(getattr(e, 'message', e))
+
+
+class TableCache:
+    def __init__(self, client, spec, ttl, full_ttl):
+        self.client, self.spec, self.ttl, self.full_ttl = client, spec, ttl, full_ttl
+        self.delta = spec.delta
+        self.df = None; self.watermark = None
+        self.synced_at = 0.0; self.full_at = 0.0
+        self.stale = False; self.need_full = False
+        self.listeners = []
+        self.lock = threading.Lock()
+
+    def _lire(self, filtres=()):
+        ordre = ((self.spec.order, self.spec.desc),) if self.spec.order else ()
+        return lire_table(self.client, self.spec.name, colonnes(self.spec, self.delta), filtres, ordre)
+
+    def _max(self):
+        if self.df.empty or self.delta not in self.df.columns: return None
+        m = self.df[self.delta].max()
+        return None if pd.isna(m) else (int(m) if self.delta == 'id' else str(m))
+
+    def _load_full(self):
+        # Colonne de synchro absente du schéma (projection explicite refusée, ou absente de '*') -> rechargement complet
+        try: self.df = self._lire()
+        except Exception as e:
+            if self.delta in (None, 'id') or not colonne_absente(e, self.delta): raise
+            self.delta = None; self.df = self._lire()
+        if self.delta and not self.df.empty and self.delta not in self.df.columns: self.delta = None
+        self.watermark = self._max() if self.delta else None
+        self.full_at = time.monotonic()
+        for fn in self.listeners: fn(self.df, True)
+
+    def _load_delta(self):
+        if self.watermark is None: return self._load_full()
+        # gte sur updated_at : deux écritures peuvent partager le même horodatage, le dédoublonnage par id absorbe le recouvrement
+        new = self._lire([('gt', 'id', self.watermark) if self.delta == 'id' else ('gte', self.delta, self.watermark)])
+        if new.empty: return
+        df = pd.concat([self.df, new], ignore_index=True).drop_duplicates('id', keep='last')
+        if self.spec.order: df = df.sort_values(self.spec.order, ascending=not self.spec.desc, kind='stable')
+        self.df = df.reset_index(drop=True)
+        self.watermark = self._max()
+        for fn in self.listeners: fn(new, False)
+
+    def get(self):
+        with self.lock:
+            now = time.monotonic()
+            expired = self.stale or now - self.synced_at > self.ttl
+            if self.df is None or self.need_full or now - self.full_at > self.full_ttl or (expired and not self.delta): self._load_full()
+            elif expired: self._load_delta()
+            self.synced_at = now; self.stale = self.need_full = False
+            # Copie : les pages convertissent created_at en place
+            return self.df.copy()
+
+    def subscribe(self, fn):
+        # fn(df, full) : table complète si full, sinon seulement les lignes nouvelles/modifiées
+        with self.lock:
+            self.listeners.append(fn)
+            if self.df is not None: fn(self.df, True)
+
+    def invalidate(self, full=False):
+        with self.lock:
+            self.stale = True; self.need_full = self.need_full or full
+
+
+class DataStore:
+    """Tables Supabase gardées en DataFrame, rafraîchies par delta après `ttl` secondes (rechargement complet après `full_ttl`)."""
+
+    def __init__(self, client, ttl=30, full_ttl=900):
+        self.tables = {n: TableCache(client, s, ttl, full_ttl) for n, s in TABLES.items()}
+
+    def get(self, name):
+        return self.tables[name].get()
+
+    def get_many(self, *names):
+        # Tables chargées en parallèle (chacune a son verrou) : la latence totale est celle de la plus lente
+        futures = [_executor.submit(propager(self.get), n) for n in names]
+        return tuple(f.result() for f in futures)
+
+    def subscribe(self, name, fn):
+        self.tables[name].subscribe(fn)
+
+    def invalidate(self, *names, full=False):
+        # full=True après une suppression : un delta ne voit pas les lignes disparues
+        for n in names:
+            self.tables[n].invalidate(full)
+            for d in DEPENDANCES.get(n, ()): self.tables[d].invalidate(full=True)
@@ -0,0 +1,126 @@
+# =========================================================
+# 🧮 VALORISATION DU STOCK (REJEU DES MOUVEMENTS)
+# =========================================================
+import threading
+
+import numpy as np
+import pandas as pd
+
+from .pmp import pmp_apres_achat
+
+TZ = 'Europe/Paris'     # même découpage des jours que ca_journalier
+TOLERANCE_PMP = 0.01
+COLS = ['id', 'article_id', 'type_mouvement', 'quantite', 'prix', 'date']
+TRI = ['article_id', 'date', 'id']
+
+
+def _vide():
+    return pd.DataFrame({'stock': pd.Series(dtype=float), 'pmp': pd.Series(dtype=float)}, index=pd.Index([], dtype='int64', name='article_id'))
+
+
+def preparer(mouv):
+    """Colonnes utiles de mouvements_stock, created_at en heure locale (sans fuseau)."""
+    if mouv.empty: return pd.DataFrame({c: pd.Series(dtype='datetime64[ns]' if c == 'date' else float) for c in COLS})
+    m = mouv.dropna(subset=['article_id', 'created_at'])
+    date = pd.to_datetime(m['created_at'], utc=True, format='ISO8601').dt.tz_convert(TZ).dt.tz_localize(None)
+    return pd.DataFrame({'id': m['id'].astype('int64'), 'article_id': m['article_id'].astype('int64'), 'type_mouvement': m['type_mouvement'],
+                         'quantite': m['quantite'].astype(float), 'prix': pd.to_numeric(m['prix_achat_unitaire'], errors='coerce'), 'date': date})
+
+
+def rejouer(m, depart=None):
+    """Stock et PMP après chaque mouvement de `m` (préparé), en partant de `depart` (stock, pmp par article_id)."""
+    depart = _vide() if depart is None else depart
+    m = m.sort_values(TRI, kind='stable').reset_index(drop=True)
+    art = m['article_id'].to_numpy(); q = m['quantite'].to_numpy()
+    p0 = depart['pmp'].reindex(art).to_numpy()
+    stock = depart['stock'].reindex(art).fillna(0).to_numpy() + m.groupby('article_id', sort=False)['quantite'].cumsum().to_numpy()
+    pmp = np.full(len(m), np.nan)
+    ia = np.flatnonzero(((m['type_mouvement'] == 'ACHAT') & (m['quantite'] > 0) & m['prix'].notna()).to_numpy())
+    if len(ia):
+        # Récurrence du PMP : à l'étape k, le k-ième achat de chaque article, tous articles à la fois
+        codes, _ = pd.factorize(art[ia])
+        rang = pd.Series(codes).groupby(codes).cumcount().to_numpy()
+        cur = np.full(codes.max() + 1, np.nan); cur[codes] = p0[ia]
+        ordre = np.argsort(rang, kind='stable'); bornes = np.searchsorted(rang[ordre], np.arange(rang.max() + 2))
+        for a, b in zip(bornes[:-1], bornes[1:]):
+            k = ordre[a:b]; i = ia[k]
+            cur[codes[k]] = pmp[i] = pmp_apres_achat(stock[i] - q[i], cur[codes[k]], q[i], m['prix'].to_numpy()[i])
+    pmp = pd.Series(pmp).groupby(art).ffill().to_numpy()
+    return m.assign(stock=stock, pmp=np.where(np.isnan(pmp), p0, pmp))
+
+
+def _etat(j, depart):
+    # Dernier mouvement de chaque article ; les articles sans mouvement gardent l'état de départ
+    if j.empty: return depart
+    fin = j.drop_duplicates('article_id', keep='last').set_index('article_id')[['stock', 'pmp']]
+    return fin.combine_first(depart) if not depart.empty else fin
+
+
+class ValorisationStock:
+    """Stock et PMP par article reconstitués depuis mouvements_stock, à n'importe quelle date.
+
+    Un point de reprise est gardé à chaque fin de mois clos : une date quelconque ne rejoue que les mouvements du mois entamé.
+    Alimenté par DataStore.subscribe('mouvements_stock', ...) : les nouveaux mouvements sont rejoués depuis l'état courant,
+    sauf s'ils sont antérieurs au dernier rejoué (rejeu complet).
+    """
+
+    def __init__(self):
+        self.mouv = preparer(pd.DataFrame())
+        self.points = {}        # Period mensuelle -> état à la fin du mois
+        self.tete = _vide(); self.mois = None; self.fin = None
+        self.lock = threading.Lock()
+
+    def charger(self, df, full):
+        new = preparer(df)
+        with self.lock:
+            if full:
+                self.mouv, self.points, self.tete, self.mois, self.fin = new, {}, _vide(), None, None
+            elif new.empty: return
+            elif self.fin is not None and new['date'].min() < self.fin:
+                self.mouv = pd.concat([self.mouv, new]).drop_duplicates('id', keep='last').reset_index(drop=True)
+                new = self.mouv; self.points, self.tete, self.mois, self.fin = {}, _vide(), None, None
+            else: self.mouv = pd.concat([self.mouv, new], ignore_index=True)
+            self._avancer(new)
+
+    def _avancer(self, new):
+        if new.empty: return
+        j = rejouer(new, self.tete)
+        mois = j['date'].dt.to_period('M'); dernier = mois.max()
+        etat = self.tete
+        for p in pd.period_range(mois.min() if self.mois is None else self.mois, dernier, freq='M')[:-1]:
+            etat = self.points[p] = _etat(j[mois == p], etat)
+        self.tete = _etat(j, self.tete); self.mois = dernier; self.fin = j['date'].max()
+
+    def etat(self, date=None):
+        """Stock, PMP et valeur par article à la fin du jour `date` (None = dernier mouvement connu)."""
+        with self.lock:
+            if date is None: e = self.tete
+            else:
+                fin = pd.Timestamp(date).normalize() + pd.Timedelta(days=1)
+                pts = [p for p in self.points if p < fin.to_period('M')]
+                p = max(pts) if pts else None
+                debut = (p + 1).start_time if p is not None else pd.Timestamp.min
+                depart = self.points[p] if p is not None else _vide(); d = self.mouv['date']
+                e = _etat(rejouer(self.mouv[(d >= debut) & (d < fin)], depart), depart)
+        return e.assign(valeur=e['stock'] * e['pmp'].fillna(0))
+
+    def valeurs_mensuelles(self):
+        """Valeur du stock à chaque fin de mois clos."""
+        with self.lock: pts = dict(self.points)
+        return pd.DataFrame({'mois': [p.end_time.date() for p in pts], 'valeur': [(e['stock'] * e['pmp'].fillna(0)).sum() for e in pts.values()]})
+
+    def ecarts(self, articles):
+        """Articles dont stock_actuel ou pmp_achat (à TOLERANCE_PMP près) ne correspond pas au rejeu du journal."""
+        e = self.etat().rename(columns={'stock': 'stock_journal', 'pmp': 'pmp_journal'})
+        d = articles.set_index('id')[['dimension_complete', 'marque', 'stock_actuel', 'pmp_achat']].join(e[['stock_journal', 'pmp_journal']])
+        d['stock_journal'] = d['stock_journal'].fillna(0)
+        pa = pd.to_numeric(d['pmp_achat'], errors='coerce')
+        ecart_stock = pd.to_numeric(d['stock_actuel'], errors='coerce').fillna(0) != d['stock_journal']
+        ecart_pmp = d['pmp_journal'].notna() & ~np.isclose(pa.fillna(-1), d['pmp_journal'].fillna(-1), atol=TOLERANCE_PMP)
+        return d[ecart_stock | ecart_pmp].reset_index()
+
+
+def corriger(client, ecarts):
+    """Réaligne les articles en écart (sql/006_corriger_stock.sql) : stock recalculé côté base, PMP issu du rejeu."""
+    p = [{'id': int(r['id']), 'pmp_achat': None if pd.isna(r['pmp_journal']) else round(float(r['pmp_journal']), 4)} for _, r in ecarts.iterrows()]
+    return client.rpc('corriger_stock', {'p_articles': p}).execute().data if p else []
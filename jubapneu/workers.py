@@ -0,0 +1,26 @@
+# =========================================================
+# ⚙️ POOL DE PROCESSUS PARTAGÉ
+# =========================================================
+import multiprocessing as mp
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+WORKERS = min(4, os.cpu_count() or 1)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool
+    with _pool_lock:
+        # spawn : un fork depuis les threads Streamlit n'est pas sûr
+        if _pool is None: _pool = ProcessPoolExecutor(max_workers=WORKERS, mp_context=mp.get_context('spawn'))
+        return _pool
+
+
+def reset_pool():
+    # Après un BrokenProcessPool : le prochain get_pool() repart d'un pool neuf
+    global _pool
+    with _pool_lock: _pool = None
@@ -0,0 +1,22 @@
+-- Horodatage de modification pour la synchro incrémentale (jubapneu/store.py).
+-- Sans cette migration, articles / clients / services sont rechargés en entier à chaque invalidation.
+create or replace function set_updated_at() returns trigger language plpgsql as $$
+begin
+  new.updated_at = now();
+  return new;
+end $$;
+
+alter table articles add column if not exists updated_at timestamptz not null default now();
+alter table clients  add column if not exists updated_at timestamptz not null default now();
+alter table services add column if not exists updated_at timestamptz not null default now();
+
+drop trigger if exists trg_articles_updated_at on articles;
+create trigger trg_articles_updated_at before update on articles for each row execute function set_updated_at();
+drop trigger if exists trg_clients_updated_at on clients;
+create trigger trg_clients_updated_at before update on clients for each row execute function set_updated_at();
+drop trigger if exists trg_services_updated_at on services;
+create trigger trg_services_updated_at before update on services for each row execute function set_updated_at();
+
+create index if not exists idx_articles_updated_at on articles (updated_at);
+create index if not exists idx_clients_updated_at on clients (updated_at);
+create index if not exists idx_services_updated_at on services (updated_at);
@@ -0,0 +1,49 @@
+-- Création de facture en une transaction (jubapneu/factures.py).
+-- Client (si nouveau), entête, lignes, décrément de stock et mouvements VENTE :
+-- tout passe ou rien ne passe, en un seul aller-retour.
+create or replace function creer_facture(p_client jsonb, p_facture jsonb, p_lignes jsonb)
+returns jsonb language plpgsql as $$
+declare
+  v_client_id bigint := (p_client->>'id')::bigint;
+  v_facture_id bigint;
+  v_numero text := p_facture->>'numero_facture';
+  v_ruptures text;
+begin
+  if v_client_id is null then
+    insert into clients (nom, telephone, adresse, code_postal, ville)
+    values (p_client->>'nom', p_client->>'telephone', p_client->>'adresse', p_client->>'code_postal', p_client->>'ville')
+    returning id into v_client_id;
+  end if;
+
+  insert into factures_entete (client_id, total_ttc, numero_facture, statut)
+  values (v_client_id, (p_facture->>'total_ttc')::numeric, v_numero, coalesce(p_facture->>'statut', 'Payée'))
+  returning id into v_facture_id;
+
+  insert into factures_lignes (facture_id, article_id, quantite, prix_vente_unitaire, cout_achat_historique)
+  select v_facture_id, (l->>'article_id')::bigint, (l->>'quantite')::int, (l->>'prix_vente_unitaire')::numeric, (l->>'cout_achat_historique')::numeric
+  from jsonb_array_elements(p_lignes) l;
+
+  -- Décrément en place (verrou de ligne) : deux ventes simultanées ne s'écrasent plus
+  with q as (
+    select (l->>'article_id')::bigint as article_id, sum((l->>'quantite')::int) as quantite
+    from jsonb_array_elements(p_lignes) l
+    where l->>'article_id' is not null
+    group by 1
+  ), maj as (
+    update articles a set stock_actuel = a.stock_actuel - q.quantite
+    from q where a.id = q.article_id
+    returning a.dimension_complete, a.stock_actuel
+  )
+  select string_agg(dimension_complete, ', ') into v_ruptures from maj where stock_actuel < 0;
+
+  if v_ruptures is not null then
+    raise exception 'Stock insuffisant : %', v_ruptures;
+  end if;
+
+  insert into mouvements_stock (article_id, type_mouvement, quantite, lien_facture_fournisseur, created_at)
+  select (l->>'article_id')::bigint, 'VENTE', -(l->>'quantite')::int, 'Vente ' || v_numero, now()
+  from jsonb_array_elements(p_lignes) l
+  where l->>'article_id' is not null;
+
+  return jsonb_build_object('facture_id', v_facture_id, 'client_id', v_client_id);
+end $$;
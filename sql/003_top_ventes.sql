@@ -0,0 +1,28 @@
+-- Agrégat "Top Ventes" calculé côté base (jubapneu/stats.py) : seules les N lignes du classement transitent.
+create or replace function top_ventes(
+  p_debut timestamptz default null,
+  p_fin timestamptz default null,
+  p_saisons text[] default null,
+  p_marques text[] default null,
+  p_limite int default 10
+)
+returns table (dimension_complete text, quantite bigint, ca numeric)
+language sql stable as $$
+  select a.dimension_complete,
+         sum(l.quantite)::bigint as quantite,
+         sum(l.quantite * l.prix_vente_unitaire)::numeric as ca
+  from factures_lignes l
+  join articles a on a.id = l.article_id
+  join factures_entete f on f.id = l.facture_id
+  where (p_debut is null or f.created_at >= p_debut)
+    and (p_fin is null or f.created_at < p_fin)
+    and (p_saisons is null or a.saison = any(p_saisons))
+    and (p_marques is null or a.marque = any(p_marques))
+  group by a.dimension_complete
+  order by quantite desc
+  limit p_limite
+$$;
+
+create index if not exists idx_factures_lignes_facture on factures_lignes (facture_id);
+create index if not exists idx_factures_lignes_article on factures_lignes (article_id);
+create index if not exists idx_factures_entete_created_at on factures_entete (created_at);
@@ -0,0 +1,52 @@
+-- Cumuls journaliers de chiffre d'affaires (jubapneu/stats.py, page "Chiffre d'Affaires").
+-- Les triggers ajoutent chaque nouvelle facture au jour concerné : un jour passé n'est jamais recalculé.
+begin;
+
+create table if not exists ca_journalier (
+  jour date primary key,
+  nb_factures int not null default 0,
+  ca_ttc numeric not null default 0,
+  cout_achat numeric not null default 0
+);
+
+-- Reprise de l'historique, avant la pose des triggers pour ne rien compter deux fois
+insert into ca_journalier (jour, nb_factures, ca_ttc, cout_achat)
+select e.jour, e.nb, coalesce(l.ca, 0), coalesce(l.cout, 0)
+from (
+  select (created_at at time zone 'Europe/Paris')::date as jour, count(*) as nb
+  from factures_entete group by 1
+) e
+left join (
+  select (f.created_at at time zone 'Europe/Paris')::date as jour,
+         sum(l.quantite * l.prix_vente_unitaire) as ca,
+         sum(l.quantite * coalesce(l.cout_achat_historique, 0)) as cout
+  from factures_lignes l join factures_entete f on f.id = l.facture_id
+  group by 1
+) l using (jour)
+on conflict (jour) do nothing;
+
+create or replace function maj_ca_journalier_entete() returns trigger language plpgsql as $$
+begin
+  insert into ca_journalier as c (jour, nb_factures)
+  values ((new.created_at at time zone 'Europe/Paris')::date, 1)
+  on conflict (jour) do update set nb_factures = c.nb_factures + 1;
+  return new;
+end $$;
+
+create or replace function maj_ca_journalier_ligne() returns trigger language plpgsql as $$
+begin
+  insert into ca_journalier as c (jour, ca_ttc, cout_achat)
+  select (f.created_at at time zone 'Europe/Paris')::date,
+         new.quantite * new.prix_vente_unitaire,
+         new.quantite * coalesce(new.cout_achat_historique, 0)
+  from factures_entete f where f.id = new.facture_id
+  on conflict (jour) do update set ca_ttc = c.ca_ttc + excluded.ca_ttc, cout_achat = c.cout_achat + excluded.cout_achat;
+  return new;
+end $$;
+
+drop trigger if exists trg_ca_journalier_entete on factures_entete;
+create trigger trg_ca_journalier_entete after insert on factures_entete for each row execute function maj_ca_journalier_entete();
+drop trigger if exists trg_ca_journalier_ligne on factures_lignes;
+create trigger trg_ca_journalier_ligne after insert on factures_lignes for each row execute function maj_ca_journalier_ligne();
+
+commit;
@@ -0,0 +1,5 @@
+-- Index de la pagination par clé (jubapneu/pagination.py) : tri (created_at, id) décroissant.
+create index if not exists idx_mouvements_stock_keyset on mouvements_stock (created_at desc, id desc);
+create index if not exists idx_mouvements_stock_type_keyset on mouvements_stock (type_mouvement, created_at desc, id desc);
+create index if not exists idx_factures_entete_keyset on factures_entete (created_at desc, id desc);
+create index if not exists idx_factures_entete_client_keyset on factures_entete (client_id, created_at desc, id desc);
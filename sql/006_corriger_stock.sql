@@ -0,0 +1,14 @@
+-- Correction des écarts articles / journal (jubapneu/valorisation.py).
+-- Le stock est recalculé côté base depuis mouvements_stock dans la même instruction que la mise à jour :
+-- une vente validée entre le rejeu et la correction n'est pas écrasée. Le PMP vient du rejeu (null = inchangé).
+create or replace function corriger_stock(p_articles jsonb)
+returns setof articles language sql as $$
+  update articles a
+  set stock_actuel = coalesce((select sum(m.quantite) from mouvements_stock m where m.article_id = a.id), 0),
+      pmp_achat = coalesce((c->>'pmp_achat')::numeric, a.pmp_achat)
+  from jsonb_array_elements(p_articles) c
+  where a.id = (c->>'id')::bigint
+  returning a.*
+$$;
+
+create index if not exists idx_mouvements_stock_article on mouvements_stock (article_id, created_at, id);
@@ -0,0 +1,79 @@
+-- File d'envoi de la réplique locale (jubapneu/replica.py).
+-- Chaque vente porte une clé d'idempotence et sa date réelle (une vente hors ligne part plus tard) ;
+-- creer_factures_lot envoie un lot de ventes en un aller-retour, chacune dans son propre sous-bloc :
+-- une vente refusée (stock insuffisant) n'annule pas les autres.
+alter table factures_entete add column if not exists cle_idempotence text;
+create unique index if not exists idx_factures_entete_cle on factures_entete (cle_idempotence) where cle_idempotence is not null;
+
+create or replace function creer_facture(p_client jsonb, p_facture jsonb, p_lignes jsonb)
+returns jsonb language plpgsql as $$
+declare
+  v_client_id bigint := (p_client->>'id')::bigint;
+  v_facture_id bigint;
+  v_numero text := p_facture->>'numero_facture';
+  v_ruptures text;
+  v_cle text := p_facture->>'cle_idempotence';
+  v_date timestamptz := coalesce((p_facture->>'created_at')::timestamptz, now());
+begin
+  -- Vente déjà reçue (renvoi après coupure) : on renvoie la facture existante sans rien recréer
+  select id, client_id into v_facture_id, v_client_id from factures_entete where v_cle is not null and cle_idempotence = v_cle;
+  if v_facture_id is not null then
+    return jsonb_build_object('facture_id', v_facture_id, 'client_id', v_client_id, 'doublon', true);
+  end if;
+  v_client_id := (p_client->>'id')::bigint;
+
+  if v_client_id is null then
+    insert into clients (nom, telephone, adresse, code_postal, ville)
+    values (p_client->>'nom', p_client->>'telephone', p_client->>'adresse', p_client->>'code_postal', p_client->>'ville')
+    returning id into v_client_id;
+  end if;
+
+  insert into factures_entete (client_id, total_ttc, numero_facture, statut, cle_idempotence, created_at)
+  values (v_client_id, (p_facture->>'total_ttc')::numeric, v_numero, coalesce(p_facture->>'statut', 'Payée'), v_cle, v_date)
+  returning id into v_facture_id;
+
+  insert into factures_lignes (facture_id, article_id, quantite, prix_vente_unitaire, cout_achat_historique)
+  select v_facture_id, (l->>'article_id')::bigint, (l->>'quantite')::int, (l->>'prix_vente_unitaire')::numeric, (l->>'cout_achat_historique')::numeric
+  from jsonb_array_elements(p_lignes) l;
+
+  -- Décrément en place (verrou de ligne) : deux ventes simultanées ne s'écrasent plus
+  with q as (
+    select (l->>'article_id')::bigint as article_id, sum((l->>'quantite')::int) as quantite
+    from jsonb_array_elements(p_lignes) l
+    where l->>'article_id' is not null
+    group by 1
+  ), maj as (
+    update articles a set stock_actuel = a.stock_actuel - q.quantite
+    from q where a.id = q.article_id
+    returning a.dimension_complete, a.stock_actuel
+  )
+  select string_agg(dimension_complete, ', ') into v_ruptures from maj where stock_actuel < 0;
+
+  if v_ruptures is not null then
+    raise exception 'Stock insuffisant : %', v_ruptures;
+  end if;
+
+  insert into mouvements_stock (article_id, type_mouvement, quantite, lien_facture_fournisseur, created_at)
+  select (l->>'article_id')::bigint, 'VENTE', -(l->>'quantite')::int, 'Vente ' || v_numero, v_date
+  from jsonb_array_elements(p_lignes) l
+  where l->>'article_id' is not null;
+
+  return jsonb_build_object('facture_id', v_facture_id, 'client_id', v_client_id);
+end $$;
+
+create or replace function creer_factures_lot(p_lot jsonb)
+returns jsonb language plpgsql as $$
+declare
+  v_item jsonb;
+  v_out jsonb := '[]'::jsonb;
+begin
+  for v_item in select * from jsonb_array_elements(p_lot) loop
+    begin
+      v_out := v_out || (creer_facture(v_item->'p_client', v_item->'p_facture' || jsonb_build_object('cle_idempotence', v_item->>'cle'), v_item->'p_lignes')
+                         || jsonb_build_object('cle', v_item->>'cle'));
+    exception when others then
+      v_out := v_out || jsonb_build_object('cle', v_item->>'cle', 'erreur', sqlerrm);
+    end;
+  end loop;
+  return v_out;
+end $$;
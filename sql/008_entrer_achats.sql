@@ -0,0 +1,21 @@
+-- Entrée en stock d'une facture fournisseur (jubapneu/importer.py).
+-- Stock et PMP sont recalculés en place, sur la ligne verrouillée par l'update : une vente validée pendant
+-- l'import (creer_facture) n'est plus écrasée, et les autres colonnes de l'article ne sont pas réécrites.
+-- Même règle que jubapneu.pmp : stock résultant nul ou négatif -> le prix d'achat devient le PMP.
+create or replace function entrer_achats(p_lignes jsonb, p_fichier text)
+returns setof articles language sql as $$
+  with l as (
+    select (x->>'article_id')::bigint as article_id, (x->>'quantite')::int as quantite, (x->>'prix')::numeric as prix
+    from jsonb_array_elements(p_lignes) x
+  ), mouv as (
+    insert into mouvements_stock (article_id, type_mouvement, quantite, prix_achat_unitaire, lien_facture_fournisseur, created_at)
+    select article_id, 'ACHAT', quantite, prix, p_fichier, now() from l
+  )
+  update articles a
+  set pmp_achat = case when coalesce(a.stock_actuel, 0) + l.quantite > 0
+                       then (coalesce(a.stock_actuel, 0) * coalesce(a.pmp_achat, 0) + l.quantite * l.prix) / (coalesce(a.stock_actuel, 0) + l.quantite)
+                       else l.prix end,
+      stock_actuel = coalesce(a.stock_actuel, 0) + l.quantite
+  from l where a.id = l.article_id
+  returning a.*
+$$;
@@ -0,0 +1,46 @@
+-- Entrée en stock rejouable (jubapneu/importer.py) : chaque lot porte une clé (empreinte du fichier + contenu du lot).
+-- Un lot déjà appliqué est ignoré : on peut relancer un import interrompu, ou retenter un appel dont la réponse
+-- s'est perdue, sans doubler le stock. Les articles manquants sont créés ici, dans la même transaction : plus
+-- d'insert nu côté client qui, rejoué, laisserait des doublons à stock nul.
+alter table mouvements_stock add column if not exists cle_import text;
+create index if not exists idx_mouvements_stock_cle_import on mouvements_stock (cle_import) where cle_import is not null;
+
+drop function if exists entrer_achats(jsonb, text);
+
+create or replace function entrer_achats(p_lignes jsonb, p_fichier text, p_cle text)
+returns table (nb_articles int, nb_crees int, doublon boolean) language plpgsql as $$
+declare v_crees int;
+begin
+  -- Imports sérialisés : test de la clé et création des articles sans course entre deux postes
+  perform pg_advisory_xact_lock(hashtext('entrer_achats'));
+  if exists (select 1 from mouvements_stock m where m.cle_import = p_cle) then
+    return query select jsonb_array_length(p_lignes), 0, true; return;
+  end if;
+
+  -- Créés à stock nul : l'achat ci-dessous pose le stock et le PMP comme pour un article existant
+  insert into articles (dimension_complete, largeur, hauteur, diametre, charge, vitesse, marque, saison, stock_actuel, pmp_achat)
+  select distinct on (a.dimension_complete, a.marque)
+         a.dimension_complete, a.largeur, a.hauteur, a.diametre, a.charge, a.vitesse, a.marque, a.saison, 0, (x->>'prix')::numeric
+  from jsonb_array_elements(p_lignes) x, jsonb_populate_record(null::articles, x->'article') a
+  where not exists (select 1 from articles e where e.dimension_complete = a.dimension_complete and e.marque = a.marque);
+  get diagnostics v_crees = row_count;
+
+  -- Doublons éventuels en base : le plus ancien reçoit l'achat (comme l'ancien charger_articles)
+  with l as (
+    select (select min(e.id) from articles e
+            where e.dimension_complete = x->'article'->>'dimension_complete' and e.marque = x->'article'->>'marque') as article_id,
+           (x->>'quantite')::int as quantite, (x->>'prix')::numeric as prix
+    from jsonb_array_elements(p_lignes) x
+  ), mouv as (
+    insert into mouvements_stock (article_id, type_mouvement, quantite, prix_achat_unitaire, lien_facture_fournisseur, cle_import, created_at)
+    select article_id, 'ACHAT', quantite, prix, p_fichier, p_cle, now() from l
+  )
+  update articles a
+  set pmp_achat = case when coalesce(a.stock_actuel, 0) + l.quantite > 0
+                       then (coalesce(a.stock_actuel, 0) * coalesce(a.pmp_achat, 0) + l.quantite * l.prix) / (coalesce(a.stock_actuel, 0) + l.quantite)
+                       else l.prix end,
+      stock_actuel = coalesce(a.stock_actuel, 0) + l.quantite
+  from l where a.id = l.article_id;
+
+  return query select jsonb_array_length(p_lignes), v_crees, false;
+end $$;